@@ -0,0 +1,63 @@
+"""Throughput of DurableChannel with per item and group commit fsync
+
+Usage: python benchmarks/bench_durable.py [--count N] [--producers P]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from one_ring import DurableChannel, FsyncPolicy, Nursery
+
+
+async def run(policy: FsyncPolicy, count: int, producers: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        ch = DurableChannel(
+            os.path.join(directory, "wal"),
+            maxsize=1024,
+            fsync_policy=policy,
+        )
+
+        async def produce(n):
+            for i in range(n):
+                await ch.send(i)
+
+        async def consume():
+            for _ in range(count):
+                ch.ack(await ch.receive())
+
+        started = time.perf_counter()
+        async with Nursery() as n:
+            n.start(consume())
+            n.start_many(produce(count // producers) for _ in range(producers))
+        elapsed = time.perf_counter() - started
+        await ch.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=5_000)
+    parser.add_argument("--producers", type=int, default=50)
+    args = parser.parse_args()
+    count = args.count // args.producers * args.producers
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        for policy in (FsyncPolicy.EVERY_ITEM, FsyncPolicy.GROUP_COMMIT):
+            elapsed = loop.run_until_complete(
+                run(policy, count, args.producers)
+            )
+            print(
+                "%-12s %8.1f ms  %10.0f items/s"
+                % (policy.name, elapsed * 1000, count / elapsed)
+            )
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
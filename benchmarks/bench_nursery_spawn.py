@@ -0,0 +1,59 @@
+"""Spawn rate of `Nursery.start` loop vs `Nursery.start_many`
+
+Usage: python benchmarks/bench_nursery_spawn.py [--count N] [--rounds R]
+"""
+import argparse
+import asyncio
+import time
+
+from one_ring import Nursery
+
+
+async def nop():
+    pass
+
+
+async def spawn_with_start(count: int) -> float:
+    started = time.perf_counter()
+    async with Nursery() as n:
+        for _ in range(count):
+            n.start(nop())
+        spawned = time.perf_counter()
+    return spawned - started
+
+
+async def spawn_with_start_many(count: int) -> float:
+    started = time.perf_counter()
+    async with Nursery() as n:
+        n.start_many(nop() for _ in range(count))
+        spawned = time.perf_counter()
+    return spawned - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        for name, bench in (
+            ("start", spawn_with_start),
+            ("start_many", spawn_with_start_many),
+        ):
+            best = min(
+                loop.run_until_complete(bench(args.count))
+                for _ in range(args.rounds)
+            )
+            print(
+                "%-10s %8.1f ms  %10.0f tasks/s"
+                % (name, best * 1000, args.count / best)
+            )
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Load generator: producers -> channels -> consumers, for a fixed time
+
+Producers send timestamped items round robin to the channels, consumers
+`select` over all channels and record how long every item took from
+send to receive. On top of that:
+
+- `--cancel-ratio` of the sends are cancelled (by `asyncio.wait_for`) if
+  they are blocked for more than `--cancel-after` seconds,
+- `--timeout-ratio` of the selects also have a `Timeout(--timeout)` case.
+
+A scenario sets the shape (fan-in: many producers to one consumer,
+fan-out: one producer to many consumers, mesh: many to many); the other
+options override it. Throughput, latency percentiles and peak memory
+(tracemalloc, only with `--tracemalloc` since it slows everything down,
+and the max RSS of the process) are written as JSON.
+
+Usage: python benchmarks/loadgen.py [--scenario mesh] [--duration 5]
+           [--producers N] [--channels M] [--consumers K] [--maxsize S]
+           [--rate R] [--cancel-ratio C] [--timeout-ratio T]
+           [--seed X] [--tracemalloc] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from one_ring import Channel, LatencyHistogram, Nursery, Timeout, select
+
+from run import _commit
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None  # type: ignore
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "fan-in": {"producers": 16, "channels": 1, "consumers": 1},
+    "fan-out": {"producers": 1, "channels": 1, "consumers": 16},
+    "mesh": {"producers": 8, "channels": 4, "consumers": 8},
+}
+
+DEFAULTS: Dict[str, Any] = {
+    "duration": 5.0,
+    "producers": 8,
+    "channels": 4,
+    "consumers": 8,
+    "maxsize": 64,
+    "rate": 0.0,
+    "cancel_ratio": 0.01,
+    "cancel_after": 0.001,
+    "timeout_ratio": 0.05,
+    "timeout": 0.001,
+    "seed": 0,
+}
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.sent = 0
+        self.received = 0
+        self.cancelled_sends = 0
+        self.timeouts = 0
+        self.latency = LatencyHistogram()
+
+
+async def run_scenario(config: Dict[str, Any]) -> Dict[str, Any]:
+    loop = asyncio.get_event_loop()
+    channels = [
+        Channel(maxsize=config["maxsize"]) for _ in range(config["channels"])
+    ]
+    stats = Stats()
+    deadline = loop.time() + config["duration"]
+
+    async def produce(index: int) -> None:
+        rng = random.Random(config["seed"] * 1_000 + index)
+        interval = 1 / config["rate"] if config["rate"] else 0.0
+        next_at = loop.time()
+        n = index
+        while loop.time() < deadline:
+            channel = channels[n % len(channels)]
+            n += 1
+            item = (time.perf_counter(),)
+            if rng.random() < config["cancel_ratio"]:
+                try:
+                    await asyncio.wait_for(
+                        channel.send(item), config["cancel_after"]
+                    )
+                except asyncio.TimeoutError:
+                    stats.cancelled_sends += 1
+                    continue
+            else:
+                await channel.send(item)
+            stats.sent += 1
+            if interval:
+                next_at += interval
+                await asyncio.sleep(max(next_at - loop.time(), 0))
+            else:
+                # a buffered send does not yield to the loop
+                await asyncio.sleep(0)
+
+    async def consume(index: int) -> None:
+        rng = random.Random(config["seed"] * 1_000 + 500 + index)
+        actions = {channel: channel.R() for channel in channels}
+        while actions:
+            if rng.random() < config["timeout_ratio"]:
+                timeout = Timeout(config["timeout"])
+                channel, item = await select(*actions.values(), timeout.R())
+                if channel is timeout:
+                    stats.timeouts += 1
+                    continue
+            else:
+                channel, item = await select(*actions.values())
+            if item is None:
+                # closed and drained
+                del actions[channel]
+                continue
+            stats.latency.record(time.perf_counter() - item[0])
+            stats.received += 1
+
+    started = time.perf_counter()
+    async with Nursery() as consumers:
+        consumers.start_many(consume(i) for i in range(config["consumers"]))
+        async with Nursery() as producers:
+            producers.start_many(
+                produce(i) for i in range(config["producers"])
+            )
+        for channel in channels:
+            channel.close()
+    elapsed = time.perf_counter() - started
+
+    latency = stats.latency
+    return {
+        "elapsed_seconds": elapsed,
+        "sent": stats.sent,
+        "received": stats.received,
+        "cancelled_sends": stats.cancelled_sends,
+        "receive_timeouts": stats.timeouts,
+        "items_per_second": stats.received / elapsed,
+        "latency_ms": {
+            "p50": latency.p50() * 1000,
+            "p99": latency.p99() * 1000,
+            "p999": latency.p999() * 1000,
+            "max": latency.max * 1000,
+            "mean": latency.sum / latency.count * 1000 if latency.count else 0,
+        },
+    }
+
+
+def _max_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS))
+    for option, default in DEFAULTS.items():
+        parser.add_argument(
+            "--" + option.replace("_", "-"), type=type(default)
+        )
+    parser.add_argument("--tracemalloc", action="store_true")
+    parser.add_argument("--output", help="file to write JSON to")
+    args = parser.parse_args()
+
+    config = dict(DEFAULTS)
+    if args.scenario:
+        config.update(SCENARIOS[args.scenario])
+    for option in DEFAULTS:
+        value = getattr(args, option)
+        if value is not None:
+            config[option] = value
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        result = loop.run_until_complete(run_scenario(config))
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+    memory: Dict[str, int] = {"max_rss_bytes": _max_rss_bytes()}
+    if args.tracemalloc:
+        memory["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    result["memory"] = memory
+
+    latency = result["latency_ms"]
+    print(
+        "%.0f items/s, latency p50 %.3f ms p99 %.3f ms p99.9 %.3f ms"
+        % (
+            result["items_per_second"],
+            latency["p50"],
+            latency["p99"],
+            latency["p999"],
+        ),
+        file=sys.stderr,
+    )
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "scenario": args.scenario,
+        "config": config,
+        "result": result,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
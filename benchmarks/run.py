@@ -0,0 +1,198 @@
+"""Microbenchmarks of channels, select, Timeout and Nursery
+
+Every benchmark runs `--rounds` times on a fresh event loop and the best
+round is reported, next to asyncio.Queue/asyncio.gather baselines. The
+results are written as JSON, so runs of different commits can be
+compared.
+
+Usage: python benchmarks/run.py [--scale S] [--rounds R] [--filter SUBSTR]
+                                [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from one_ring import Channel, Nursery, Timeout, select
+
+BENCHMARKS: List[Tuple[str, int, Callable[[int], Awaitable[Any]]]] = []
+
+
+def benchmark(name: str, ops: int):
+    """Registers a benchmark that does `ops` operations (times --scale)"""
+
+    def register(func):
+        BENCHMARKS.append((name, ops, func))
+        return func
+
+    return register
+
+
+async def _channel_throughput(channel: Channel, n: int) -> None:
+    async def produce():
+        for i in range(n):
+            await channel.send(i)
+
+    async def consume():
+        for _ in range(n):
+            await channel.receive()
+
+    async with Nursery() as nursery:
+        nursery.start(consume())
+        nursery.start(produce())
+
+
+@benchmark("channel.unbuffered.send_receive", 20_000)
+async def unbuffered_channel(n: int) -> None:
+    await _channel_throughput(Channel(), n)
+
+
+@benchmark("channel.buffered.send_receive", 100_000)
+async def buffered_channel(n: int) -> None:
+    await _channel_throughput(Channel(maxsize=1024), n)
+
+
+@benchmark("channel.buffered.nowait", 200_000)
+async def buffered_channel_nowait(n: int) -> None:
+    ch = Channel(maxsize=1)
+    send, receive = ch.send_nowait, ch.receive_nowait
+    for i in range(n):
+        send(i)
+        receive()
+
+
+@benchmark("baseline.asyncio_queue.put_get", 100_000)
+async def asyncio_queue(n: int) -> None:
+    q: asyncio.Queue = asyncio.Queue(maxsize=1024)
+
+    async def produce():
+        for i in range(n):
+            await q.put(i)
+
+    async def consume():
+        for _ in range(n):
+            await q.get()
+
+    await asyncio.gather(consume(), produce())
+
+
+def _select_benchmark(cases: int):
+    async def run(n: int) -> None:
+        channels = [Channel(maxsize=1) for _ in range(cases)]
+        actions = [ch.R() for ch in channels]
+        for i in range(n):
+            # a different case is ready every time
+            channels[i % cases].send_nowait(i)
+            await select(*actions)
+
+    return run
+
+
+for _cases in (1, 2, 4, 8, 16, 32):
+    benchmark(f"select.cases_{_cases}", 20_000)(_select_benchmark(_cases))
+
+
+@benchmark("timeout.create", 50_000)
+async def timeout_create(n: int) -> None:
+    for _ in range(n):
+        Timeout(3600)
+
+
+async def _nop() -> None:
+    pass
+
+
+@benchmark("nursery.start", 20_000)
+async def nursery_start(n: int) -> None:
+    async with Nursery() as nursery:
+        for _ in range(n):
+            nursery.start(_nop())
+
+
+@benchmark("nursery.start_many", 20_000)
+async def nursery_start_many(n: int) -> None:
+    async with Nursery() as nursery:
+        nursery.start_many(_nop() for _ in range(n))
+
+
+@benchmark("baseline.asyncio_gather", 20_000)
+async def asyncio_gather(n: int) -> None:
+    await asyncio.gather(*(_nop() for _ in range(n)))
+
+
+def run_benchmark(
+    func: Callable[[int], Awaitable[Any]], ops: int, rounds: int
+) -> Dict[str, float]:
+    times = []
+    for _ in range(rounds):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            started = time.perf_counter()
+            loop.run_until_complete(func(ops))
+            times.append(time.perf_counter() - started)
+        finally:
+            loop.close()
+            asyncio.set_event_loop(None)
+    best = min(times)
+    return {
+        "ops": ops,
+        "best_seconds": best,
+        "mean_seconds": sum(times) / len(times),
+        "ops_per_second": ops / best,
+        "us_per_op": best * 1_000_000 / ops,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--output", help="file to write JSON to")
+    args = parser.parse_args()
+
+    results = {}
+    for name, ops, func in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        ops = max(1, int(ops * args.scale))
+        results[name] = result = run_benchmark(func, ops, args.rounds)
+        print(
+            "%-36s %12.0f ops/s %10.2f us/op"
+            % (name, result["ops_per_second"], result["us_per_op"]),
+            file=sys.stderr,
+        )
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "rounds": args.rounds,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
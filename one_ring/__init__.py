@@ -1,16 +1,73 @@
-from .csp import Channel, select, Timeout, select_nowait
-from .nursery import Nursery, NurseryChildFailure, ActionOnFailure
-from .asyncio_sugar import run_main
+from .csp import Channel, PriorityChannel, select, Timeout, select_nowait
+from .nursery import (
+    Nursery,
+    NurseryChildFailure,
+    ActionOnFailure,
+    ChildResult,
+)
+from .asyncio_sugar import run_main, LoopLagMonitor, Stall
+from .cancel_scope import CancelScope, move_on_after, move_on_at
+from .worker_pool import WorkerPool
+from .sharding import run_sharded, Shard
+from .threadsafe import ThreadSafeChannel
+from .crossloop import CrossLoopChannel
+from .remote import RemoteChannel, serve
+from .spill import SpillChannel
+from .durable import DurableChannel, Delivery, FsyncPolicy
+from .log import LogChannel, LogReader
+from .codel import CoDelChannel, CoDelMode
+from .metrics import (
+    ChannelMetrics,
+    LatencyHistogram,
+    NurseryMetrics,
+    enable_metrics,
+)
+from .tracing import add_hook, remove_hook, ChromeTraceRecorder
+from .cpu_accounting import CpuAccounting, CpuUsage
+from .testing import VirtualTimeEventLoop, run_virtual
 
 __version__ = "0.1.1"
 
 __all__ = [
     "Channel",
+    "PriorityChannel",
     "select",
     "select_nowait",
     "Timeout",
     "Nursery",
     "NurseryChildFailure",
     "ActionOnFailure",
+    "ChildResult",
     "run_main",
+    "LoopLagMonitor",
+    "Stall",
+    "CancelScope",
+    "move_on_after",
+    "move_on_at",
+    "WorkerPool",
+    "run_sharded",
+    "Shard",
+    "ThreadSafeChannel",
+    "CrossLoopChannel",
+    "RemoteChannel",
+    "serve",
+    "SpillChannel",
+    "DurableChannel",
+    "Delivery",
+    "FsyncPolicy",
+    "LogChannel",
+    "LogReader",
+    "CoDelChannel",
+    "CoDelMode",
+    "ChannelMetrics",
+    "LatencyHistogram",
+    "NurseryMetrics",
+    "enable_metrics",
+    "add_hook",
+    "remove_hook",
+    "ChromeTraceRecorder",
+    "CpuAccounting",
+    "CpuUsage",
+    "VirtualTimeEventLoop",
+    "run_virtual",
 ]
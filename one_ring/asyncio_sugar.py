@@ -1,7 +1,13 @@
 import sys
 import asyncio
+import collections
+import threading
+import time
+import traceback
 from asyncio import AbstractEventLoop
-from typing import Optional
+from typing import Callable, Deque, List, NamedTuple, Optional
+
+from .metrics import LatencyHistogram
 
 
 def run_main(main_coro):
@@ -21,3 +27,123 @@ def get_current_task(loop: Optional[AbstractEventLoop] = None) -> asyncio.Task:
     if sys.version_info.minor <= 7:
         return asyncio.Task.current_task(loop=loop)
     return asyncio.current_task(loop=loop)
+
+
+class Stall(NamedTuple):
+    """A period in which the loop did not run its callbacks in time"""
+
+    lag: float
+    # stack of the loop thread while it was stalled
+    stack: List[str]
+    task: Optional[asyncio.Task]
+    # name of the nursery child that was running, if it was one
+    child_name: Optional[str]
+
+
+class LoopLagMonitor:
+    """Measures how late the loop runs its callbacks
+
+    A probe is scheduled every `interval` seconds and the delay between
+    its due time and when it actually ran is recorded in `lag`. A
+    watchdog thread checks the probe; when the loop is stuck for more
+    than `threshold` seconds it captures the stack of the loop thread and
+    the running task. The stall is reported (kept in `stalls` and passed
+    to `on_stall`) on the loop once it is free again, with its full lag.
+
+    Start it from the thread of the loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        threshold: float = 0.1,
+        on_stall: Optional[Callable[[Stall], None]] = None,
+        max_stalls: int = 100,
+        loop: Optional[AbstractEventLoop] = None,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.on_stall = on_stall
+        self.lag = LatencyHistogram()
+        self.stalls: Deque[Stall] = collections.deque(maxlen=max_stalls)
+        self._loop = loop or asyncio.get_event_loop()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._due: float = 0.0
+        # monotonic time of the last probe, read by the watchdog
+        self._beat: float = 0.0
+        self._captured: Optional[Stall] = None
+        self._loop_thread_id: int = 0
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "LoopLagMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if self._handle is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._beat = time.monotonic()
+        self._schedule()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="one-ring-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _schedule(self) -> None:
+        self._due = self._loop.time() + self.interval
+        self._handle = self._loop.call_at(self._due, self._probe)
+
+    def _probe(self) -> None:
+        lag = max(self._loop.time() - self._due, 0.0)
+        self._beat = time.monotonic()
+        self.lag.record(lag)
+        stall, self._captured = self._captured, None
+        if stall is not None:
+            stall = stall._replace(lag=lag)
+            self.stalls.append(stall)
+            if self.on_stall is not None:
+                self.on_stall(stall)
+        self._schedule()
+
+    def _watch(self) -> None:
+        period = max(self.threshold / 2, 0.005)
+        captured_beat = 0.0
+        while not self._stopped.wait(period):
+            beat = self._beat
+            late = time.monotonic() - beat - self.interval
+            if late < self.threshold or beat == captured_beat:
+                continue
+            captured_beat = beat
+            stall = self._capture(late)
+            if self._beat == beat:
+                self._captured = stall
+
+    def _capture(self, lag: float) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame) if frame is not None else []
+        try:
+            task = get_current_task(loop=self._loop)
+        except RuntimeError:
+            task = None
+        child_name = None
+        if task is not None:
+            # imported here, the nursery module imports this one
+            from .nursery import find_child_name
+
+            child_name = find_child_name(task)
+        return Stall(lag, stack, task, child_name)
@@ -0,0 +1,144 @@
+import asyncio
+import heapq
+import itertools
+import weakref
+from asyncio import AbstractEventLoop
+from typing import Callable, List, Optional, Tuple
+
+from .asyncio_sugar import get_current_task
+
+_deadline_queues: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+class _DeadlineQueue:
+    """Heap of cancel scopes of a loop, driven by a single timer handle."""
+
+    def __init__(self, loop: AbstractEventLoop) -> None:
+        self._loop = loop
+        self._heap: List[Tuple[float, int, "CancelScope"]] = []
+        self._counter = itertools.count()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._handle_when: float = 0.0
+        self._dead: int = 0
+
+    def push(self, scope: "CancelScope", deadline: float) -> None:
+        heapq.heappush(self._heap, (deadline, next(self._counter), scope))
+        if self._handle is None or deadline < self._handle_when:
+            self._arm(deadline)
+
+    def discard(self, scope: "CancelScope") -> None:
+        # entries are removed lazily, rebuild the heap if most are dead
+        self._dead += 1
+        if self._dead > 64 and self._dead * 2 > len(self._heap):
+            self._heap = [e for e in self._heap if e[2]._queued]
+            heapq.heapify(self._heap)
+            self._dead = 0
+
+    def _arm(self, when: float) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle_when = when
+        self._handle = self._loop.call_at(when, self._fire)
+
+    def _fire(self) -> None:
+        now = max(self._loop.time(), self._handle_when)
+        self._handle = None
+        heap = self._heap
+        while heap and (heap[0][0] <= now or not heap[0][2]._queued):
+            _, _, scope = heapq.heappop(heap)
+            if scope._queued:
+                scope._queued = False
+                scope.cancel()
+            else:
+                self._dead -= 1
+        if heap:
+            self._arm(heap[0][0])
+
+
+def _get_deadline_queue(loop: AbstractEventLoop) -> _DeadlineQueue:
+    queue = _deadline_queues.get(loop)
+    if queue is None:
+        queue = _deadline_queues[loop] = _DeadlineQueue(loop)
+    return queue
+
+
+class CancelScope:
+    """Cancels the task running its body when the deadline is reached
+
+    The cancellation is caught at the end of the ``with`` block, so the
+    task moves on after it; check `cancelled_caught` to know whether the
+    body was interrupted. All scopes of a loop share one timer handle.
+    """
+
+    def __init__(
+        self,
+        deadline: Optional[float] = None,
+        loop: Optional[AbstractEventLoop] = None,
+        on_cancel: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.deadline: Optional[float] = deadline
+        self.cancel_called: bool = False
+        self.cancelled_caught: bool = False
+        self._loop: AbstractEventLoop = loop or asyncio.get_event_loop()
+        self._on_cancel = on_cancel
+        self._task: Optional[asyncio.Task] = None
+        self._in_body: bool = False
+        self._task_cancelled: bool = False
+        self._queued: bool = False
+
+    def __enter__(self) -> "CancelScope":
+        if self._task is not None:
+            raise RuntimeError("cancel scope can not be entered twice")
+        self._task = get_current_task(loop=self._loop)
+        self._in_body = True
+        if self.deadline is not None:
+            self._queued = True
+            _get_deadline_queue(self._loop).push(self, self.deadline)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._in_body = False
+        if self._queued:
+            self._queued = False
+            _get_deadline_queue(self._loop).discard(self)
+        if (
+            exc_type is None
+            or not issubclass(exc_type, asyncio.CancelledError)
+            or not self._task_cancelled
+        ):
+            return False
+        uncancel = getattr(self._task, "uncancel", None)
+        if uncancel is not None and uncancel() > 0:
+            # the task was cancelled from outside of the scope as well
+            return False
+        self.cancelled_caught = True
+        return True
+
+    def cancel(self) -> None:
+        """Cancels the body of the scope (and calls on_cancel)"""
+        if self.cancel_called:
+            return
+        self.cancel_called = True
+        if self._in_body and self._task is not None:
+            self._task_cancelled = True
+            self._task.cancel()
+        if self._on_cancel is not None:
+            self._on_cancel()
+
+
+def move_on_at(
+    deadline: Optional[float], loop: Optional[AbstractEventLoop] = None
+) -> CancelScope:
+    """Returns a cancel scope that expires at `deadline` (in loop time)"""
+    return CancelScope(deadline, loop=loop)
+
+
+def move_on_after(
+    delay: Optional[float], loop: Optional[AbstractEventLoop] = None
+) -> CancelScope:
+    """Returns a cancel scope that expires after `delay` seconds"""
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    if delay is None:
+        return CancelScope(None, loop=loop)
+    return CancelScope(loop.time() + delay, loop=loop)
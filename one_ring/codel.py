@@ -0,0 +1,162 @@
+import asyncio
+import collections
+import math
+from enum import IntEnum
+from typing import Any, Callable, Deque, Optional
+
+from .csp import Channel, SendNoneToChannelError
+from .metrics import enable_metrics
+
+
+class CoDelMode(IntEnum):
+    DROP = 0
+    REJECT = 1
+
+
+class CoDelChannel(Channel):
+    """Channel that sheds load when items wait too long in it (CoDel)
+
+    Items are timestamped when they are put. Once the sojourn time of the
+    oldest item stays above `target` seconds for `interval` seconds, the
+    channel is overloaded: with DROP, items are dropped from the head at
+    the CoDel control law rate (`on_drop` is called with every dropped
+    item); with REJECT, `send` and `send_nowait` return False without
+    queueing the item until the delay goes below `target` again.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        target: float = 0.005,
+        interval: float = 0.1,
+        mode: CoDelMode = CoDelMode.DROP,
+        on_drop: Optional[Callable[[Any], None]] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        max_bytes: Optional[int] = None,
+        sizer: Callable[[Any], int] = len,
+        name: Optional[str] = None,
+        metrics: bool = False,
+        latency: bool = False,
+    ) -> None:
+        if target <= 0 or interval <= 0:
+            raise ValueError("target and interval must be positive numbers")
+        super().__init__(
+            maxsize=maxsize,
+            loop=loop,
+            max_bytes=max_bytes,
+            sizer=sizer,
+            name=name,
+        )
+        self.target = target
+        self.interval = interval
+        self.mode = mode
+        self.on_drop = on_drop
+        self.dropped: int = 0
+        self.rejected: int = 0
+        self._timestamps: Deque[float] = collections.deque()
+        self._last_put_time: float = 0.0
+        self._first_above_time: float = 0.0
+        self._dropping: bool = False
+        self._drop_next: float = 0.0
+        self._count: int = 0
+        self._last_count: int = 0
+        if metrics or latency:
+            enable_metrics(self, latency=latency)
+
+    def _put(self, item: Any) -> None:
+        self._timestamps.append(self._loop.time())
+        super()._put(item)
+
+    def _get(self) -> Any:
+        self._last_put_time = self._timestamps.popleft()
+        return super()._get()
+
+    def _stamp_put(self) -> None:
+        # _put has already timestamped the item
+        pass
+
+    def _take_put_time(self) -> float:
+        return self._last_put_time
+
+    def overloaded(self) -> bool:
+        """Return True while the channel drops or rejects items."""
+        return self._dropping
+
+    def _ok_to_drop(self, now: float) -> bool:
+        # a single item is not a standing queue
+        if len(self._data) <= 1 or now - self._timestamps[0] < self.target:
+            self._first_above_time = 0.0
+            return False
+        if self._first_above_time == 0.0:
+            self._first_above_time = now + self.interval
+            return False
+        return now >= self._first_above_time
+
+    def _control_law(self, t: float) -> float:
+        return t + self.interval / math.sqrt(self._count)
+
+    def _drop_head(self) -> None:
+        item = self._get()
+        self.dropped += 1
+        self._wakeup_next(self._senders)
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def _control(self) -> None:
+        now = self._loop.time()
+        ok_to_drop = self._ok_to_drop(now)
+        if self.mode == CoDelMode.REJECT:
+            self._dropping = ok_to_drop
+            return
+        if self._dropping:
+            if not ok_to_drop:
+                self._dropping = False
+                return
+            while now >= self._drop_next and self._dropping:
+                self._drop_head()
+                self._count += 1
+                if self._ok_to_drop(now):
+                    self._drop_next = self._control_law(self._drop_next)
+                else:
+                    self._dropping = False
+        elif ok_to_drop:
+            self._drop_head()
+            self._dropping = True
+            delta = self._count - self._last_count
+            # dropping again soon after the last episode, go on from its rate
+            if delta > 1 and now - self._drop_next < 16 * self.interval:
+                self._count = delta
+            else:
+                self._count = 1
+            self._drop_next = self._control_law(now)
+            self._last_count = self._count
+
+    def _move_data(self) -> bool:
+        if self._data:
+            self._control()
+        return super()._move_data()
+
+    def receive_nowait(self) -> Any:
+        if self._data:
+            self._control()
+        return super().receive_nowait()
+
+    def send_nowait(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        if self._dropping and self.mode == CoDelMode.REJECT:
+            self.rejected += 1
+            return False
+        return super().send_nowait(item)
+
+    async def send(
+        self, item: Any, future: Optional[asyncio.Future] = None
+    ) -> bool:
+        if self._dropping and self.mode == CoDelMode.REJECT:
+            if future is not None and future.done():
+                return False
+            is_done = self.send_nowait(item)
+            if future is not None:
+                future.set_result((self, item if is_done else None))
+            return is_done
+        return await super().send(item, future)
@@ -0,0 +1,104 @@
+import collections
+import collections.abc
+import time
+from typing import Any, Coroutine, DefaultDict, List, NamedTuple
+
+
+class CpuUsage(NamedTuple):
+    name: str
+    cpu_time: float
+    steps: int
+
+
+class CpuAccounting:
+    """Collects the CPU time that coroutines spend in every step
+
+    Pass it to `Nursery(cpu_accounting=...)` (one object can be shared by
+    many nurseries): the coroutines of children are wrapped, and the
+    thread CPU time of every `send`/`throw` is added to the name of the
+    child. Children of `start_many` are grouped by the qualified name of
+    their coroutine.
+    """
+
+    def __init__(self) -> None:
+        self.cpu_time: DefaultDict[str, float] = collections.defaultdict(float)
+        self.steps: DefaultDict[str, int] = collections.defaultdict(int)
+
+    def wrap(self, coro: Coroutine, name: str) -> Coroutine:
+        return _AccountedCoroutine(coro, name, self)
+
+    def _add(self, name: str, cpu_time: float) -> None:
+        self.cpu_time[name] += cpu_time
+        self.steps[name] += 1
+
+    def top(self, n: int = 10) -> List[CpuUsage]:
+        """Returns the `n` names that used the most CPU time"""
+        usage = [
+            CpuUsage(name, cpu_time, self.steps[name])
+            for name, cpu_time in self.cpu_time.items()
+        ]
+        usage.sort(key=lambda u: u.cpu_time, reverse=True)
+        return usage[:n]
+
+    def report(self, n: int = 10) -> str:
+        """Returns `top(n)` as a text table"""
+        lines = [
+            "%-40s %12s %10s %12s" % ("name", "cpu ms", "steps", "us/step")
+        ]
+        for u in self.top(n):
+            lines.append(
+                "%-40s %12.3f %10d %12.1f"
+                % (
+                    u.name,
+                    u.cpu_time * 1000,
+                    u.steps,
+                    u.cpu_time * 1_000_000 / u.steps,
+                )
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        self.cpu_time.clear()
+        self.steps.clear()
+
+
+class _AccountedCoroutine(collections.abc.Coroutine):
+    """Coroutine wrapper that measures the CPU time of every step"""
+
+    __slots__ = ("_coro", "_name", "_accounting")
+
+    def __init__(
+        self, coro: Coroutine, name: str, accounting: CpuAccounting
+    ) -> None:
+        self._coro = coro
+        self._name = name
+        self._accounting = accounting
+
+    def send(self, value: Any) -> Any:
+        started = time.thread_time()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._accounting._add(self._name, time.thread_time() - started)
+
+    def throw(self, *args: Any) -> Any:
+        started = time.thread_time()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._accounting._add(self._name, time.thread_time() - started)
+
+    def close(self) -> None:
+        self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __next__(self) -> Any:
+        return self.send(None)
+
+    def __iter__(self):
+        return self
+
+    def __repr__(self) -> str:
+        return f"<accounted {self._coro!r} as {self._name!r}>"
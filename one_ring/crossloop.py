@@ -0,0 +1,169 @@
+import asyncio
+import collections
+from typing import Any, Deque
+
+from .csp import SendNoneToChannelError
+
+
+class CrossLoopChannel:
+    """Buffered channel between two event loops running in their own threads
+
+    `send` and `send_nowait` must be called on `sender_loop`, `receive` and
+    `receive_nowait` on `receiver_loop`. Waiters of each end park on their
+    own loop. The items are passed through a deque (its append and popleft
+    are atomic) and every side announces that it is parked with a flag, so
+    there is no lock on the fast path. Wakeups of the other loop are
+    coalesced: one `call_soon_threadsafe` is pending at most per direction.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        sender_loop: asyncio.AbstractEventLoop,
+        receiver_loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize of cross loop channel must be positive")
+        self._maxsize = maxsize
+        self._sender_loop = sender_loop
+        self._receiver_loop = receiver_loop
+        self._data: Deque[Any] = collections.deque()
+        self._senders: Deque[asyncio.Future] = collections.deque()
+        self._receivers: Deque[asyncio.Future] = collections.deque()
+        self._senders_parked: bool = False
+        self._receivers_parked: bool = False
+        self._senders_wakeup_pending: bool = False
+        self._receivers_wakeup_pending: bool = False
+        self._closed_flag: bool = False
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__} at {id(self):#x} "
+            f"maxsize={self._maxsize!r} size={self.size()}>"
+        )
+
+    def size(self) -> int:
+        """Number of items in channel."""
+        return len(self._data)
+
+    @property
+    def maxsize(self) -> int:
+        """Number of items allowed in the channel."""
+        return self._maxsize
+
+    def empty(self) -> bool:
+        """Return True if the channel is empty, False otherwise."""
+        return not self._data
+
+    def full(self) -> bool:
+        """Return True if there are maxsize items in the channel."""
+        return len(self._data) >= self._maxsize
+
+    def is_closed(self) -> bool:
+        return self._closed_flag
+
+    def close(self) -> None:
+        "Closes the channel, can be called from both loops"
+        if self._closed_flag:
+            return
+        self._closed_flag = True
+        self._notify_senders()
+        self._notify_receivers()
+
+    def send_nowait(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        if self._closed_flag or len(self._data) >= self._maxsize:
+            return False
+        self._data.append(item)
+        if self._receivers_parked:
+            self._notify_receivers()
+        return True
+
+    async def send(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        while not self.send_nowait(item):
+            if self._closed_flag:
+                return False
+            await self._park(
+                self._sender_loop, self._senders, "_senders_parked"
+            )
+        return True
+
+    def receive_nowait(self) -> Any:
+        try:
+            item = self._data.popleft()
+        except IndexError:
+            return None
+        if self._senders_parked:
+            self._notify_senders()
+        return item
+
+    async def receive(self) -> Any:
+        while True:
+            item = self.receive_nowait()
+            if item is not None or self._closed_flag:
+                if item is None:
+                    # items may have been sent right before closing
+                    item = self.receive_nowait()
+                return item
+            await self._park(
+                self._receiver_loop, self._receivers, "_receivers_parked"
+            )
+
+    async def _park(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        waiters: Deque[asyncio.Future],
+        parked_flag: str,
+    ) -> None:
+        waiter = loop.create_future()
+        waiters.append(waiter)
+        setattr(self, parked_flag, True)
+        # check again after announcing it, the other side may have already
+        # changed the state without seeing the flag
+        if waiters is self._senders:
+            ready = len(self._data) < self._maxsize
+        else:
+            ready = bool(self._data)
+        if ready or self._closed_flag:
+            waiters.remove(waiter)
+            return
+        try:
+            await waiter
+        except BaseException:
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            raise
+
+    def _notify_senders(self) -> None:
+        if self._senders_wakeup_pending:
+            return
+        self._senders_wakeup_pending = True
+        self._sender_loop.call_soon_threadsafe(self._wakeup_senders)
+
+    def _notify_receivers(self) -> None:
+        if self._receivers_wakeup_pending:
+            return
+        self._receivers_wakeup_pending = True
+        self._receiver_loop.call_soon_threadsafe(self._wakeup_receivers)
+
+    def _wakeup_senders(self) -> None:
+        self._senders_wakeup_pending = False
+        self._senders_parked = False
+        _wakeup_all(self._senders)
+
+    def _wakeup_receivers(self) -> None:
+        self._receivers_wakeup_pending = False
+        self._receivers_parked = False
+        _wakeup_all(self._receivers)
+
+
+def _wakeup_all(waiters: Deque[asyncio.Future]) -> None:
+    while waiters:
+        waiter = waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(None)
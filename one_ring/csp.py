@@ -1,4 +1,6 @@
 import collections
+import heapq
+import itertools
 from random import shuffle
 from typing import (
     Tuple,
@@ -9,10 +11,14 @@ from typing import (
     Awaitable,
     Union,
     Deque,
+    List,
 )
 import asyncio
 from enum import Enum
 
+from .metrics import ChannelMetrics, enable_metrics
+from .tracing import _hooks as _trace_hooks, emit as trace
+
 SendNoneToChannelError = ValueError("you can not send None to a channel")
 
 
@@ -21,14 +27,18 @@ class SelectAction(str, Enum):
     RECEIVE = "R"
 
 
+# channel of an action is a Channel or any other channel with the methods
+# select uses (SharedMemoryChannel, LogChannel, LogReader, ...)
+
+
 class SendAction(NamedTuple):
-    channel: "Channel"
+    channel: Any
     callback: Optional[Callable[["Channel", Any], Awaitable[Any]]]
     item: Any
 
 
 class ReceiveAction(NamedTuple):
-    channel: "Channel"
+    channel: Any
     callback: Optional[Callable[["Channel", Any], Awaitable[Any]]]
 
 
@@ -36,22 +46,46 @@ Selectable = Union[ReceiveAction, SendAction]
 
 
 class Channel:
+    # send times of the buffered items, only created by
+    # enable_metrics(latency=True) with _stamp_buffered
+    _put_times: Deque[float]
+
     def __init__(
         self,
         maxsize: int = 0,
         loop: Optional[asyncio.AbstractEventLoop] = None,
+        max_bytes: Optional[int] = None,
+        sizer: Callable[[Any], int] = len,
+        name: Optional[str] = None,
+        metrics: bool = False,
+        latency: bool = False,
     ) -> None:
         if loop is None:
-            self._loop = asyncio.get_event_loop()
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self.name = name
 
         if maxsize < 0:
             raise ValueError("maxsize of channel can not be a negative number")
         self._maxsize = maxsize
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes of channel must be a positive number")
+        # with max_bytes the channel is buffered (even if maxsize is 0) and
+        # full once the sizes of buffered items add up to max_bytes
+        self._max_bytes = max_bytes
+        self._sizer = sizer
+        self._bytes: int = 0
+        if max_bytes is not None:
+            # sizes of the buffered items, in the order of _data
+            self._sizes: Deque[int] = collections.deque()
 
         self._receivers: Deque[asyncio.Future] = collections.deque()
         self._senders: Deque[asyncio.Future] = collections.deque()
         self._data: Deque[Any] = collections.deque()
         self._closed_flag: bool = False
+        self._metrics: Optional[ChannelMetrics] = None
+        if metrics or latency:
+            enable_metrics(self, latency=latency)
 
     def __repr__(self) -> str:
         return f"<{type(self).__name__} at {id(self):#x} {self._format()}>"
@@ -64,18 +98,31 @@ class Channel:
 
     def _format(self) -> str:
         result = f"maxsize={self._maxsize!r}"
+        if self._max_bytes is not None:
+            result += f" max_bytes={self._max_bytes!r} bytes={self._bytes!r}"
         if getattr(self, "_data", None):
-            result += f" _data={list(self._data)!r}"
+            result += f" _data={self._buffered()!r}"
         if self._receivers:
             result += f" _receivers[{len(self._receivers)}]"
         if self._senders:
             result += f" _senders[{len(self._senders)}]"
         return result
 
+    def _buffered(self) -> List[Any]:
+        # the items in the order they are received
+        return list(self._data)
+
     def _get(self) -> Any:
+        if self._max_bytes is not None:
+            self._bytes -= self._sizes.popleft()
         return self._data.popleft()
 
     def _put(self, item: Any) -> None:
+        if self._max_bytes is not None:
+            # sized once, an item may change while it is buffered
+            size = self._sizer(item)
+            self._sizes.append(size)
+            self._bytes += size
         self._data.append(item)
 
     def _wakeup_next(self, waiters) -> None:
@@ -90,18 +137,37 @@ class Channel:
         """Number of items in channel."""
         return len(self._data)
 
+    def waiting_senders(self) -> int:
+        """Number of senders blocked on the channel."""
+        return sum(1 for s in self._senders if not s.done())
+
+    def byte_size(self) -> int:
+        """Sum of the sizes of buffered items, 0 without max_bytes."""
+        return self._bytes
+
     @property
     def maxsize(self) -> int:
         """Number of items allowed in the channel."""
         return self._maxsize
 
+    @property
+    def max_bytes(self) -> Optional[int]:
+        """Number of bytes allowed in the channel."""
+        return self._max_bytes
+
     def empty(self) -> bool:
         """Return True if the channel is empty, False otherwise."""
         return not self._data
 
     def full(self) -> bool:
         """Return True if there are maxsize items in the channel."""
-        if self._maxsize <= 0:
+        if self._max_bytes is not None:
+            # one item can overshoot max_bytes, or large ones never fit
+            if self._bytes >= self._max_bytes:
+                return True
+            if self._maxsize <= 0:
+                return False
+        elif self._maxsize <= 0:
             return self.size() > 0
         return self.size() >= self._maxsize
 
@@ -110,6 +176,8 @@ class Channel:
         if self._closed_flag is True:
             return
         self._closed_flag = True
+        if _trace_hooks:
+            trace("channel.close", self)
         while self._senders:
             sender = self._senders.popleft()
             if not sender.done():
@@ -135,7 +203,12 @@ class Channel:
         while self._receivers:
             receiver = self._receivers.popleft()
             if not receiver.done():
-                receiver.set_result((self, self._get()))
+                item = self._get()
+                if self._metrics is not None:
+                    self._record_receive(self._metrics)
+                if _trace_hooks:
+                    trace("channel.receive", self, item)
+                receiver.set_result((self, item))
                 break
         self._wakeup_next(self._senders)
         return True
@@ -145,7 +218,7 @@ class Channel:
             return False
         if self.full():
             return False
-        if self._maxsize == 0:
+        if self._maxsize == 0 and self._max_bytes is None:
             return any((not i.done() for i in self._receivers))
         return True
 
@@ -165,6 +238,11 @@ class Channel:
                     future.set_result((self, None))
                 return False
             self._senders.append(sender)
+            metrics = self._metrics
+            if metrics is not None:
+                started = self._loop.time()
+            if _trace_hooks:
+                trace("channel.block_send", self)
             try:
                 await sender
             except Exception:
@@ -183,45 +261,102 @@ class Channel:
                     # the call. Wake up the next in line.
                     self._wakeup_next(self._senders)
                 raise
+            finally:
+                if metrics is not None:
+                    blocked = self._loop.time() - started
+                    metrics.send_blocked_time += blocked
+                if _trace_hooks:
+                    trace("channel.unblock_send", self)
 
         if future is not None and future.done():
             return False
         is_done = self.send_nowait(item)
         if future is not None:
-            future.set_result((self, item))
+            # a subclass may still refuse it (CoDelChannel rejects items)
+            future.set_result((self, item if is_done else None))
         return is_done
 
     def send_nowait(self, item: Any) -> bool:
         if item is None:
             raise SendNoneToChannelError
         if not self._can_send():
+            if self._metrics is not None:
+                self._metrics.send_failures += 1
             return False
         self._put(item)
+        if self._metrics is not None:
+            self._record_send(self._metrics)
+        if _trace_hooks:
+            trace("channel.send", self, item)
         self._move_data()
+        if self._metrics is not None:
+            self._record_size(self._metrics)
+        # with max_bytes a received item may make room for many senders
+        if self._max_bytes is not None and self._senders and self._can_send():
+            self._wakeup_next(self._senders)
         return True
 
+    def _record_send(self, metrics: ChannelMetrics) -> None:
+        metrics.sends += 1
+        if metrics.sojourn is not None:
+            self._stamp_put()
+
+    def _record_size(self, metrics: ChannelMetrics) -> None:
+        size = self.size()
+        if size > metrics.peak_size:
+            metrics.peak_size = size
+
+    def _record_receive(self, metrics: ChannelMetrics) -> None:
+        metrics.receives += 1
+        if metrics.sojourn is not None:
+            sojourn = self._loop.time() - self._take_put_time()
+            metrics.sojourn.record(sojourn)
+
+    def _stamp_put(self) -> None:
+        self._put_times.append(self._loop.time())
+
+    def _take_put_time(self) -> float:
+        return self._put_times.popleft()
+
+    def _stamp_buffered(self, now: float) -> None:
+        self._put_times = collections.deque([now] * self.size())
+
     def add_future_to_receivers(self, f: asyncio.Future) -> None:
         self._receivers.append(f)
         if (
             not self._move_data()
             and self.empty()
             and self._maxsize == 0
+            and self._max_bytes is None
             and self._senders
         ):
             self._wakeup_next(self._senders)
 
     def remove_future_from_receivers(self, f: asyncio.Future) -> None:
-        try:
+        # a membership check, the ValueError of deque.remove would format
+        # the repr of the future and so of the whole channel
+        if f in self._receivers:
             self._receivers.remove(f)
-        except ValueError as e:
-            if "deque.remove(x): x not in deque" in str(e):
-                pass
 
     async def receive(self, future: Optional[asyncio.Future] = None) -> Any:
         receiver = self._loop.create_future()
         self.add_future_to_receivers(receiver)
-        await receiver
-        self.remove_future_from_receivers(receiver)
+        metrics = self._metrics
+        if (metrics is not None or _trace_hooks) and not receiver.done():
+            started = self._loop.time()
+            if _trace_hooks:
+                trace("channel.block_receive", self)
+            try:
+                await receiver
+            finally:
+                if metrics is not None:
+                    blocked = self._loop.time() - started
+                    metrics.receive_blocked_time += blocked
+                if _trace_hooks:
+                    trace("channel.unblock_receive", self)
+        else:
+            await receiver
+        # the future is popped from the receivers when it is resolved
         _, result = receiver.result()
         if future is not None:
             future.set_result(result)
@@ -229,8 +364,16 @@ class Channel:
 
     def receive_nowait(self) -> Any:
         if self.empty():
+            if self._metrics is not None:
+                self._metrics.receive_failures += 1
             return None
-        return self._get()
+        item = self._get()
+        if self._metrics is not None:
+            self._record_receive(self._metrics)
+        if _trace_hooks:
+            trace("channel.receive", self, item)
+        self._wakeup_next(self._senders)
+        return item
 
     def R(
         self,
@@ -246,6 +389,75 @@ class Channel:
         return SendAction(channel=self, item=item, callback=callback)
 
 
+class PriorityChannel(Channel):
+    """Channel that hands out the item with the lowest priority first
+
+    `priority` maps an item to its priority (the item itself by default).
+    Items of equal priority come out in the order they were sent.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        max_bytes: Optional[int] = None,
+        sizer: Callable[[Any], int] = len,
+        name: Optional[str] = None,
+        metrics: bool = False,
+        latency: bool = False,
+        priority: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        super().__init__(
+            maxsize=maxsize,
+            loop=loop,
+            max_bytes=max_bytes,
+            sizer=sizer,
+            name=name,
+        )
+        self._priority = priority
+        # heap of (priority, sequence number, item, put time, size)
+        self._data: List[Tuple[Any, int, Any, float, int]] = []  # type: ignore
+        self._seq = itertools.count()
+        self._last_put_time: float = 0.0
+        if metrics or latency:
+            enable_metrics(self, latency=latency)
+
+    def _buffered(self) -> List[Any]:
+        return [entry[2] for entry in sorted(self._data)]
+
+    def _put(self, item: Any) -> None:
+        priority = item if self._priority is None else self._priority(item)
+        put_time = 0.0
+        if self._metrics is not None and self._metrics.sojourn is not None:
+            put_time = self._loop.time()
+        size = 0
+        if self._max_bytes is not None:
+            size = self._sizer(item)
+            self._bytes += size
+        heapq.heappush(
+            self._data, (priority, next(self._seq), item, put_time, size)
+        )
+
+    def _get(self) -> Any:
+        _, _, item, self._last_put_time, size = heapq.heappop(self._data)
+        self._bytes -= size
+        return item
+
+    def _stamp_put(self) -> None:
+        # the put time is kept in the heap entry
+        pass
+
+    def _take_put_time(self) -> float:
+        return self._last_put_time
+
+    def _stamp_buffered(self, now: float) -> None:
+        # priority and sequence number are unique, the heap order holds
+        self._data = [
+            (priority, seq, item, now, size)
+            for priority, seq, item, _, size in self._data
+        ]
+
+
 def select_nowait(
     *select_actions: Selectable,
 ) -> Tuple[Optional[Channel], Any]:
@@ -301,6 +513,8 @@ async def select(*select_actions: Selectable) -> Tuple[Channel, Any]:
         t.cancel()
 
     ch, result = future.result()
+    if _trace_hooks:
+        trace("select.won", ch, len(select_actions))
     callback = callback_set[channel_set.index(ch)]
     if callback is not None:
         await callback(channel, result)
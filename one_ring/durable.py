@@ -0,0 +1,290 @@
+import asyncio
+import collections
+import os
+import pickle
+import struct
+import zlib
+from enum import IntEnum
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .csp import Channel
+from .metrics import enable_metrics
+
+# kind, delivery id, payload length, crc32 of payload
+_RECORD = struct.Struct("<BQII")
+_SEND = 1
+_ACK = 2
+
+
+class FsyncPolicy(IntEnum):
+    EVERY_ITEM = 0
+    GROUP_COMMIT = 1
+
+
+class Delivery(NamedTuple):
+    id: int
+    item: Any
+
+
+class DurableChannel(Channel):
+    """Channel whose items survive a crash, delivered at least once
+
+    Every sent item is appended to a write-ahead log at `path`. With
+    GROUP_COMMIT, records are written and fsync'ed in batches (all that
+    arrive while the previous batch is being synced, or within
+    `commit_interval`) by a single committer; with EVERY_ITEM each send is
+    synced on its own. Writes and fsyncs run in the default executor, and
+    `send` returns after the item is durable.
+
+    Once the log is `compact_bytes` long (and twice as long as after the
+    last compaction), the committer rewrites it with only the records of
+    unacked items.
+
+    Receivers get `Delivery(id, item)` and must `ack` it; deliveries that
+    are not acked within `visibility_timeout` seconds are delivered again.
+    Unacked items of the log are delivered again after a restart.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = 0,
+        fsync_policy: FsyncPolicy = FsyncPolicy.GROUP_COMMIT,
+        commit_interval: float = 0.0,
+        visibility_timeout: float = 30.0,
+        compact_bytes: int = 64 * 1024 * 1024,
+        dumps: Callable[[Any], bytes] = pickle.dumps,
+        loads: Callable[[bytes], Any] = pickle.loads,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        name: Optional[str] = None,
+        metrics: bool = False,
+        latency: bool = False,
+    ) -> None:
+        super().__init__(maxsize=maxsize, loop=loop, name=name)
+        self.fsync_policy = fsync_policy
+        self.commit_interval = commit_interval
+        self.visibility_timeout = visibility_timeout
+        self.compact_bytes = compact_bytes
+        self._dumps = dumps
+        self._loads = loads
+        self._in_flight: "collections.OrderedDict[int, Tuple[Delivery, float]]"
+        self._in_flight = collections.OrderedDict()
+        # loop time of the first send of every unacked delivery by id, kept
+        # across redeliveries for the sojourn metric
+        self._sent_times: Dict[int, float] = {}
+        self._last_put_time: float = 0.0
+        self._redelivery_handle: Optional[asyncio.TimerHandle] = None
+        # records to write, every batch is synced (and its future set) as
+        # a whole
+        self._batches: Deque[Tuple[bytearray, asyncio.Future]]
+        self._batches = collections.deque()
+        self._last_batch: Optional[asyncio.Future] = None
+        self._committer: Optional[asyncio.Task] = None
+        self._path = path
+        self._file: IO[bytes] = open(path, "a+b")
+        self._compacted_size: int = 0
+        self._next_id: int = 1
+        now = self._loop.time()
+        for delivery in self._recover():
+            self._data.append(delivery)
+            self._sent_times[delivery.id] = now
+        if metrics or latency:
+            enable_metrics(self, latency=latency)
+
+    def _recover(self) -> List[Delivery]:
+        self._file.seek(0)
+        content = self._file.read()
+        pending: Dict[int, Any] = {}
+        pos = 0
+        while pos + _RECORD.size <= len(content):
+            kind, id, length, crc = _RECORD.unpack_from(content, pos)
+            start = pos + _RECORD.size
+            payload = content[start : start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            if kind == _SEND:
+                pending[id] = payload
+            elif kind == _ACK:
+                pending.pop(id, None)
+            self._next_id = max(self._next_id, id + 1)
+            pos = start + length
+        # drop a torn record at the end of the log
+        self._file.truncate(pos)
+        return [Delivery(id, self._loads(p)) for id, p in pending.items()]
+
+    def _append_record(self, kind: int, id: int, payload: bytes = b"") -> None:
+        record = _RECORD.pack(kind, id, len(payload), zlib.crc32(payload))
+        if self.fsync_policy == FsyncPolicy.EVERY_ITEM or not self._batches:
+            self._batches.append((bytearray(), self._loop.create_future()))
+        data, self._last_batch = self._batches[-1]
+        data += record
+        data += payload
+        if self._committer is None:
+            self._committer = self._loop.create_task(self._commit())
+
+    def _write_and_sync(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def _commit(self) -> None:
+        batch = None
+        try:
+            while self._batches:
+                if self.commit_interval:
+                    await asyncio.sleep(self.commit_interval)
+                data, batch = self._batches.popleft()
+                await self._loop.run_in_executor(
+                    None, self._write_and_sync, bytes(data)
+                )
+                batch.set_result(None)
+                batch = None
+                if not self._batches and self._should_compact():
+                    await self._compact()
+        except BaseException as e:
+            if batch is not None:
+                batch.set_exception(e)
+            raise
+        finally:
+            self._committer = None
+
+    def _put(self, item: Any) -> None:
+        id = self._next_id
+        self._next_id += 1
+        self._append_record(_SEND, id, self._dumps(item))
+        self._data.append(Delivery(id, item))
+        self._sent_times[id] = self._loop.time()
+
+    def _get(self) -> Delivery:
+        delivery = self._data.popleft()
+        self._in_flight[delivery.id] = (
+            delivery,
+            self._loop.time() + self.visibility_timeout,
+        )
+        if self._redelivery_handle is None:
+            self._arm_redelivery()
+        self._last_put_time = self._sent_times[delivery.id]
+        return delivery
+
+    def _stamp_put(self) -> None:
+        pass
+
+    def _take_put_time(self) -> float:
+        return self._last_put_time
+
+    async def send(
+        self, item: Any, future: Optional[asyncio.Future] = None
+    ) -> bool:
+        """Sends an item and waits until it is written to the log"""
+        is_done = await super().send(item, future)
+        if is_done:
+            # send_nowait has just put the record in this batch
+            assert self._last_batch is not None
+            await asyncio.shield(self._last_batch)
+        return is_done
+
+    def ack(self, delivery: Union[Delivery, int]) -> None:
+        """Marks a delivery as processed, it will not be delivered again"""
+        id = delivery.id if isinstance(delivery, Delivery) else delivery
+        if self._in_flight.pop(id, None) is None:
+            # it may be waiting for redelivery
+            for queued in self._data:
+                if queued.id == id:
+                    self._data.remove(queued)
+                    self._wakeup_next(self._senders)
+                    break
+            else:
+                return
+        del self._sent_times[id]
+        self._append_record(_ACK, id)
+
+    def in_flight(self) -> int:
+        """Number of deliveries that are not acked yet."""
+        return len(self._in_flight)
+
+    def _arm_redelivery(self) -> None:
+        _, deadline = next(iter(self._in_flight.values()))
+        self._redelivery_handle = self._loop.call_at(deadline, self._redeliver)
+
+    def _redeliver(self) -> None:
+        self._redelivery_handle = None
+        now = self._loop.time()
+        expired = []
+        while self._in_flight:
+            id, (delivery, deadline) = next(iter(self._in_flight.items()))
+            if deadline > now:
+                break
+            del self._in_flight[id]
+            expired.append(delivery)
+        # put them back in front, the oldest first
+        self._data.extendleft(reversed(expired))
+        while self._move_data():
+            pass
+        if self._in_flight:
+            self._arm_redelivery()
+
+    def _should_compact(self) -> bool:
+        size = os.fstat(self._file.fileno()).st_size
+        return size >= self.compact_bytes and size >= 2 * self._compacted_size
+
+    async def _compact(self) -> None:
+        # every record written so far is synced, records of later sends and
+        # acks are written to the new log by the next batches
+        live = [delivery for delivery, _ in self._in_flight.values()]
+        live.extend(self._data)
+        live.sort(key=lambda delivery: delivery.id)
+        records = bytearray()
+        for delivery in live:
+            payload = self._dumps(delivery.item)
+            records += _RECORD.pack(
+                _SEND, delivery.id, len(payload), zlib.crc32(payload)
+            )
+            records += payload
+        new_file = await self._loop.run_in_executor(
+            None, self._rewrite, bytes(records)
+        )
+        self._file.close()
+        self._file = new_file
+        self._compacted_size = len(records)
+
+    def _rewrite(self, records: bytes) -> IO[bytes]:
+        path = self._path + ".compact"
+        with open(path, "wb") as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path, self._path)
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self._path)), 0)
+        except OSError:
+            pass
+        else:
+            try:
+                # make the rename durable
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        return open(self._path, "a+b")
+
+    async def aclose(self) -> None:
+        """Closes the channel, flushes the log and closes its file"""
+        self.close()
+        if self._committer is not None:
+            await asyncio.shield(self._committer)
+        if self._redelivery_handle is not None:
+            self._redelivery_handle.cancel()
+            self._redelivery_handle = None
+        self._file.close()
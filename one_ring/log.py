@@ -0,0 +1,309 @@
+import array
+import asyncio
+import bisect
+import collections
+import mmap
+import struct
+import tempfile
+import time
+from typing import Any, Deque, List, Optional
+
+from .csp import ReceiveAction, SendAction, SendNoneToChannelError
+
+_LENGTH = struct.Struct("I")
+
+
+class _LogSegment:
+    """Memory mapped temporary file holding the records from `base_offset`"""
+
+    def __init__(
+        self, base_offset: int, size: int, directory: Optional[str]
+    ) -> None:
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._view = memoryview(self._map)
+        self.base_offset = base_offset
+        self.size = size
+        self.write_pos: int = 0
+        self.positions = array.array("Q")
+        self.last_append: float = time.monotonic()
+
+    @property
+    def next_offset(self) -> int:
+        return self.base_offset + len(self.positions)
+
+    def append(self, record: Any) -> bool:
+        length = len(record)
+        start = self.write_pos + _LENGTH.size
+        if start + length > self.size:
+            return False
+        _LENGTH.pack_into(self._map, self.write_pos, length)
+        self._map[start : start + length] = record
+        self.positions.append(self.write_pos)
+        self.write_pos = start + length
+        self.last_append = time.monotonic()
+        return True
+
+    def read(self, offset: int) -> memoryview:
+        position = self.positions[offset - self.base_offset]
+        (length,) = _LENGTH.unpack_from(self._map, position)
+        start = position + _LENGTH.size
+        return self._view[start : start + length]
+
+    def close(self) -> None:
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # readers still hold views of it, the mapping goes away with
+            # the last one
+            pass
+        self._file.close()
+
+
+class LogChannel:
+    """Append-only channel of bytes that keeps its history
+
+    Sent items are appended to memory mapped segment files and get
+    increasing offsets. Any number of readers (`reader`) read the log
+    from their own offset; items are not removed when they are read and
+    every reader gets a memoryview of the same stored record.
+
+    Sealed segments are removed when the log is larger than
+    `retention_bytes` or their last item is older than
+    `retention_seconds`, checked on append. A reader that falls behind
+    retention skips to the oldest retained item (see `LogReader.lost`).
+    Views of removed segments stay valid while they are referenced.
+    """
+
+    def __init__(
+        self,
+        segment_size: int = 16 * 1024 * 1024,
+        retention_bytes: Optional[int] = None,
+        retention_seconds: Optional[float] = None,
+        directory: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        if segment_size <= _LENGTH.size:
+            raise ValueError("segment_size is too small")
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self._segment_size = segment_size
+        self.retention_bytes = retention_bytes
+        self.retention_seconds = retention_seconds
+        self._directory = directory
+        self._segments: List[_LogSegment] = [
+            _LogSegment(0, segment_size, directory)
+        ]
+        self._bases: List[int] = [0]
+        self._bytes: int = 0
+        self._parked: List["LogReader"] = []
+        self._closed_flag: bool = False
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__} at {id(self):#x} "
+            f"first_offset={self.first_offset} "
+            f"next_offset={self.next_offset} segments={len(self._segments)}>"
+        )
+
+    @property
+    def first_offset(self) -> int:
+        """Offset of the oldest retained item."""
+        return self._bases[0]
+
+    @property
+    def next_offset(self) -> int:
+        """Offset that the next appended item gets."""
+        return self._segments[-1].next_offset
+
+    def size(self) -> int:
+        """Number of retained items."""
+        return self.next_offset - self.first_offset
+
+    def byte_size(self) -> int:
+        """Bytes used by the retained segments."""
+        return self._bytes + self._segments[-1].write_pos
+
+    def full(self) -> bool:
+        """A log channel is never full."""
+        return False
+
+    def is_closed(self) -> bool:
+        return self._closed_flag
+
+    def close(self) -> None:
+        "Closes the log, readers still get the retained items"
+        if self._closed_flag:
+            return
+        self._closed_flag = True
+        self._wakeup_readers()
+
+    def release(self) -> None:
+        """Closes the log and removes its segment files"""
+        self.close()
+        for segment in self._segments:
+            segment.close()
+
+    def append(self, item: Any) -> int:
+        """Appends a bytes-like item and returns its offset"""
+        if self._closed_flag:
+            raise RuntimeError("append to a closed log channel")
+        segment = self._segments[-1]
+        offset = segment.next_offset
+        if not segment.append(item):
+            self._bytes += segment.write_pos
+            segment = _LogSegment(
+                offset,
+                max(self._segment_size, _LENGTH.size + len(item)),
+                self._directory,
+            )
+            segment.append(item)
+            self._segments.append(segment)
+            self._bases.append(offset)
+        self._apply_retention()
+        if self._parked:
+            self._wakeup_readers()
+        return offset
+
+    def send_nowait(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        if self._closed_flag:
+            return False
+        self.append(item)
+        return True
+
+    async def send(
+        self, item: Any, future: Optional[asyncio.Future] = None
+    ) -> bool:
+        if future is not None and future.done():
+            return False
+        is_done = self.send_nowait(item)
+        if future is not None:
+            future.set_result((self, item if is_done else None))
+        return is_done
+
+    def S(self, item: Any, callback=None) -> SendAction:
+        return SendAction(channel=self, item=item, callback=callback)
+
+    def read(self, offset: int) -> Optional[memoryview]:
+        """Returns the item at `offset`, None if it is not retained"""
+        if not self.first_offset <= offset < self.next_offset:
+            return None
+        index = bisect.bisect_right(self._bases, offset) - 1
+        return self._segments[index].read(offset)
+
+    def reader(self, offset: Optional[int] = None) -> "LogReader":
+        """Returns a reader from `offset`, new items only by default"""
+        return LogReader(self, self.next_offset if offset is None else offset)
+
+    def _apply_retention(self) -> None:
+        segments = self._segments
+        while len(segments) > 1:
+            oldest = segments[0]
+            if not (
+                self.retention_bytes is not None
+                and self.byte_size() > self.retention_bytes
+            ) and not (
+                self.retention_seconds is not None
+                and time.monotonic() - oldest.last_append
+                > self.retention_seconds
+            ):
+                return
+            segments.pop(0)
+            self._bases.pop(0)
+            self._bytes -= oldest.write_pos
+            oldest.close()
+
+    def _park(self, reader: "LogReader") -> None:
+        if reader not in self._parked:
+            self._parked.append(reader)
+
+    def _wakeup_readers(self) -> None:
+        parked, self._parked = self._parked, []
+        for reader in parked:
+            reader._on_data()
+
+
+class LogReader:
+    """Cursor of a LogChannel, can be used in `select` like a channel"""
+
+    def __init__(self, log: LogChannel, offset: int) -> None:
+        self._log = log
+        self.offset = offset
+        self.lost: int = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._receivers: Deque[asyncio.Future] = collections.deque()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__} at {id(self):#x} "
+            f"offset={self.offset} lag={self.lag()}>"
+        )
+
+    def lag(self) -> int:
+        """Number of items the reader has not read yet."""
+        return self._log.next_offset - max(self.offset, self._log.first_offset)
+
+    def seek(self, offset: int) -> None:
+        self.offset = offset
+
+    def receive_nowait(self) -> Optional[memoryview]:
+        log = self._log
+        if self.offset < log.first_offset:
+            self.lost += log.first_offset - self.offset
+            self.offset = log.first_offset
+        item = log.read(self.offset)
+        if item is not None:
+            self.offset += 1
+        return item
+
+    async def receive(self, future: Optional[asyncio.Future] = None) -> Any:
+        while True:
+            item = self.receive_nowait()
+            if item is not None or self._log.is_closed():
+                break
+            waiter = self._log._loop.create_future()
+            self._waiters.append(waiter)
+            self._log._park(self)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                raise
+        if future is not None:
+            future.set_result(item)
+        return item
+
+    def add_future_to_receivers(self, f: asyncio.Future) -> None:
+        self._receivers.append(f)
+        self._on_data()
+
+    def remove_future_from_receivers(self, f: asyncio.Future) -> None:
+        try:
+            self._receivers.remove(f)
+        except ValueError:
+            pass
+
+    def _on_data(self) -> None:
+        # parked receives read by themselves when they are woken up
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        select_receivers = self._receivers
+        while select_receivers:
+            if select_receivers[0].done():
+                select_receivers.popleft()
+                continue
+            item = self.receive_nowait()
+            if item is None and not self._log.is_closed():
+                self._log._park(self)
+                return
+            select_receivers.popleft().set_result((self, item))
+
+    def R(self, callback=None) -> ReceiveAction:
+        return ReceiveAction(channel=self, callback=callback)
@@ -0,0 +1,292 @@
+import collections
+import math
+import weakref
+from typing import Any, Counter, Dict, Iterable, List, Optional
+
+_QUANTILES = (0.5, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations, in the style of HdrHistogram
+
+    Values are recorded in microseconds. Every power of two range is split
+    into `2 ** significant_bits` buckets, so a reported value is at most
+    `2 ** -significant_bits` (about 3% by default) above the recorded one.
+    """
+
+    def __init__(self, significant_bits: int = 5) -> None:
+        if not 1 <= significant_bits <= 16:
+            raise ValueError("significant_bits must be between 1 and 16")
+        self._bits = significant_bits
+        self._sub_buckets = 1 << significant_bits
+        self._counts: List[int] = []
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+
+    def _index(self, value: int) -> int:
+        if value < 2 * self._sub_buckets:
+            return value
+        shift = value.bit_length() - self._bits - 1
+        return (shift + 1) * self._sub_buckets + (
+            (value >> shift) - self._sub_buckets
+        )
+
+    def _highest_value(self, index: int) -> int:
+        if index < 2 * self._sub_buckets:
+            return index
+        shift = index // self._sub_buckets - 1
+        lowest = (index % self._sub_buckets + self._sub_buckets) << shift
+        return lowest + (1 << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        if seconds < 0:
+            seconds = 0.0
+        index = self._index(int(seconds * 1_000_000))
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Returns the duration (in seconds) below which `q` of values are"""
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                value = self._highest_value(index) / 1_000_000
+                return min(value, self.max)
+        return self.max
+
+    def p50(self) -> float:
+        return self.quantile(0.5)
+
+    def p99(self) -> float:
+        return self.quantile(0.99)
+
+    def p999(self) -> float:
+        return self.quantile(0.999)
+
+    def reset(self) -> None:
+        self._counts = []
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class ChannelMetrics:
+    """Counters of one channel, updated by the channel itself"""
+
+    __slots__ = (
+        "sends",
+        "receives",
+        "send_failures",
+        "receive_failures",
+        "peak_size",
+        "send_blocked_time",
+        "receive_blocked_time",
+        "sojourn",
+    )
+
+    def __init__(self) -> None:
+        self.sends: int = 0
+        self.receives: int = 0
+        # send_nowait/receive_nowait calls that did not move an item
+        self.send_failures: int = 0
+        self.receive_failures: int = 0
+        self.peak_size: int = 0
+        # seconds senders and receivers spent waiting in the channel
+        self.send_blocked_time: float = 0.0
+        self.receive_blocked_time: float = 0.0
+        # how long items waited in the channel, only with latency=True
+        self.sojourn: Optional[LatencyHistogram] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        sojourn = result.pop("sojourn")
+        if sojourn is not None:
+            result["sojourn_p50"] = sojourn.p50()
+            result["sojourn_p99"] = sojourn.p99()
+            result["sojourn_p999"] = sojourn.p999()
+        return result
+
+
+class NurseryMetrics:
+    """Counters of the children of a nursery, up to date while it runs
+
+    `outcomes` counts how failed and cancelled children ended:
+    ``failure_ignored`` and ``failure_cancelled_children`` by what the
+    ActionOnFailure of the nursery did about the failure,
+    ``cancelled_by_nursery`` for children that the nursery cancelled (on
+    a failure or its deadline) and ``cancelled`` for the others.
+    """
+
+    def __init__(self) -> None:
+        self.started: int = 0
+        self.finished: int = 0
+        self.failed: int = 0
+        self.cancelled: int = 0
+        self.max_running: int = 0
+        # wall time from start to the end of every child
+        self.durations = LatencyHistogram()
+        self.outcomes: Counter = collections.Counter()
+        self._started_at: Dict[Any, float] = {}
+
+    @property
+    def running(self) -> int:
+        """Number of children that are not done yet."""
+        return len(self._started_at)
+
+    def _on_start(self, tasks: Iterable[Any], now: float) -> None:
+        started_at = self._started_at
+        for task in tasks:
+            started_at[task] = now
+            self.started += 1
+        if len(started_at) > self.max_running:
+            self.max_running = len(started_at)
+
+    def _on_done(self, task: Any, now: float, outcome: Optional[str]) -> None:
+        started = self._started_at.pop(task, None)
+        if started is None:
+            return
+        self.durations.record(now - started)
+        if outcome is None:
+            self.finished += 1
+            return
+        if outcome.startswith("failure"):
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        self.outcomes[outcome] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "running": self.running,
+            "max_running": self.max_running,
+            "finished": self.finished,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "duration_p50": self.durations.p50(),
+            "duration_p99": self.durations.p99(),
+            "duration_max": self.durations.max,
+            "outcomes": dict(self.outcomes),
+        }
+
+
+class ChannelRegistry:
+    """Weak set of the channels with metrics enabled"""
+
+    def __init__(self) -> None:
+        self._channels: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+    def register(self, channel: Any) -> None:
+        self._channels.add(channel)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns the metrics and the current state of live channels"""
+        result = []
+        for channel in list(self._channels):
+            row = {
+                "name": channel_name(channel),
+                "type": type(channel).__name__,
+                "size": channel.size(),
+                "maxsize": channel.maxsize,
+                "waiting_senders": channel.waiting_senders(),
+                "waiting_receivers": sum(
+                    1 for r in channel._receivers if not r.done()
+                ),
+            }
+            row.update(channel._metrics.as_dict())
+            result.append(row)
+        return sorted(result, key=lambda row: row["name"])
+
+    def prometheus_text(self, prefix: str = "one_ring_channel") -> str:
+        """Returns the snapshot in Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for key, kind in _PROMETHEUS_METRICS:
+            name = f"{prefix}_{key}"
+            if kind == "counter":
+                name += "_total"
+            lines.append(f"# TYPE {name} {kind}")
+            for row in snapshot:
+                lines.append(
+                    f'{name}{{channel="{_escape(row["name"])}",'
+                    f'type="{row["type"]}"}} {row[key]}'
+                )
+        name = f"{prefix}_sojourn_seconds"
+        lines.append(f"# TYPE {name} summary")
+        for channel in sorted(self._channels, key=channel_name):
+            sojourn = channel._metrics.sojourn
+            if sojourn is None:
+                continue
+            labels = (
+                f'channel="{_escape(channel_name(channel))}",'
+                f'type="{type(channel).__name__}"'
+            )
+            for q in _QUANTILES:
+                lines.append(
+                    f'{name}{{{labels},quantile="{q}"}} {sojourn.quantile(q)}'
+                )
+            lines.append(f"{name}_sum{{{labels}}} {sojourn.sum}")
+            lines.append(f"{name}_count{{{labels}}} {sojourn.count}")
+        return "\n".join(lines) + "\n"
+
+
+_PROMETHEUS_METRICS = (
+    ("sends", "counter"),
+    ("receives", "counter"),
+    ("send_failures", "counter"),
+    ("receive_failures", "counter"),
+    ("send_blocked_time", "counter"),
+    ("receive_blocked_time", "counter"),
+    ("size", "gauge"),
+    ("peak_size", "gauge"),
+    ("waiting_senders", "gauge"),
+    ("waiting_receivers", "gauge"),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = ChannelRegistry()
+
+
+def channel_name(channel: Any) -> str:
+    name = getattr(channel, "name", None)
+    if name is None:
+        return f"{type(channel).__name__}-{id(channel):#x}"
+    return name
+
+
+def enable_metrics(
+    channel: Any, name: Optional[str] = None, latency: bool = False
+) -> None:
+    """Starts collecting metrics of a channel and registers it
+
+    With `latency`, the time every item spends in the channel is recorded
+    in `sojourn`. Send times are kept next to the items (items are not
+    wrapped), in send order unless the channel keeps them itself, as
+    PriorityChannel, CoDelChannel and DurableChannel do.
+    """
+    if name is not None:
+        channel.name = name
+    if channel._metrics is None:
+        channel._metrics = ChannelMetrics()
+    if latency and channel._metrics.sojourn is None:
+        # the items that are already in the channel count from now on
+        channel._stamp_buffered(channel._loop.time())
+        channel._metrics.sojourn = LatencyHistogram()
+    registry.register(channel)
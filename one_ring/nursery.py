@@ -1,12 +1,32 @@
 import asyncio
 from asyncio import AbstractEventLoop
-from typing import Dict, Optional, Any, Awaitable
+import collections
+import weakref
+from typing import (
+    Dict,
+    Optional,
+    Any,
+    Coroutine,
+    Iterable,
+    List,
+    Set,
+    NamedTuple,
+    Deque,
+)
 from enum import IntEnum
 
 from .asyncio_sugar import get_current_task
+from .cancel_scope import CancelScope
+from .cpu_accounting import CpuAccounting
+from .csp import Channel
+from .metrics import NurseryMetrics
+from .tracing import _hooks as _trace_hooks, emit as trace
 
 NURSERY_MAIN_TASK_NAME = "main-task-0"
 
+# open nurseries, to find which child a task is
+_live_nurseries: "weakref.WeakSet[Nursery]" = weakref.WeakSet()
+
 
 class ActionOnFailure(IntEnum):
     IGNORE_WITHOUT_RAISE = 0
@@ -19,16 +39,41 @@ class NurseryChildFailure(Exception):
     pass
 
 
+class ChildResult(NamedTuple):
+    """Outcome of a child, pushed to the results channel of a nursery"""
+
+    name: Optional[str]
+    task: asyncio.Task
+    result: Any
+    exception: Optional[BaseException]
+
+
 class Nursery(object):
     def __init__(
         self,
         on_failure: ActionOnFailure = ActionOnFailure.IGNORE_WITHOUT_RAISE,
         loop: Optional[AbstractEventLoop] = None,
+        deadline: Optional[float] = None,
+        results: Optional[Channel] = None,
+        metrics: bool = False,
+        cpu_accounting: Optional[CpuAccounting] = None,
     ):
         self.action_on_failure: ActionOnFailure = on_failure
+        self.deadline: Optional[float] = deadline
+        self.cancel_scope: Optional[CancelScope] = None
         self.tasks: Dict[str, asyncio.Task] = {}
         self.exception: Dict[str, Any] = {}
+        self.results: Optional[Channel] = results
+        self._anonymous_tasks: Set[asyncio.Task] = set()
+        self._task_names: Dict[asyncio.Task, str] = {}
+        self._pending_results: Deque[ChildResult] = collections.deque()
+        self._results_flusher: Optional[asyncio.Task] = None
         self._loop: AbstractEventLoop = loop or asyncio.get_event_loop()
+        self.metrics: Optional[NurseryMetrics] = None
+        if metrics:
+            self.metrics = NurseryMetrics()
+        self._cancelled_by_nursery: Set[asyncio.Task] = set()
+        self.cpu_accounting: Optional[CpuAccounting] = cpu_accounting
         self.__task_number: int = 1
 
     def _inc_task_number(self) -> int:
@@ -40,7 +85,7 @@ class Nursery(object):
         return "task-%s" % self._inc_task_number()
 
     def start(
-        self, coro: Awaitable[Any], name: Optional[str] = None
+        self, coro: Coroutine[Any, Any, Any], name: Optional[str] = None
     ) -> asyncio.Task:
         """Starts a tasks and binds it to the nursery"""
         if name is None:
@@ -50,26 +95,79 @@ class Nursery(object):
                 "there is another task with the same name in this nursery.",
                 {"name": name},
             )
+        if self.cpu_accounting is not None:
+            coro = self.cpu_accounting.wrap(coro, name)
         t = self._loop.create_task(coro)
         t.add_done_callback(self._task_done_hook)
         self.tasks[name] = t
+        self._task_names[t] = name
+        if self.metrics is not None:
+            self.metrics._on_start((t,), self._loop.time())
+        if _trace_hooks:
+            trace("nursery.task_start", self, t)
         return t
 
+    def start_many(
+        self, coros: Iterable[Coroutine[Any, Any, Any]]
+    ) -> List[asyncio.Task]:
+        """Starts anonymous tasks in bulk and binds them to the nursery
+
+        Anonymous tasks skip name generation and the uniqueness check, so
+        they are not listed in `tasks` and can not be found by name.
+        """
+        create_task = self._loop.create_task
+        hook = self._task_done_hook
+        if self.cpu_accounting is not None:
+            wrap = self.cpu_accounting.wrap
+            coros = (wrap(c, _coroutine_name(c)) for c in coros)
+        tasks = [create_task(coro) for coro in coros]
+        for t in tasks:
+            t.add_done_callback(hook)
+        self._anonymous_tasks.update(tasks)
+        if self.metrics is not None:
+            self.metrics._on_start(tasks, self._loop.time())
+        if _trace_hooks:
+            for t in tasks:
+                trace("nursery.task_start", self, t)
+        return tasks
+
+    def _children(self) -> List[asyncio.Task]:
+        children = [
+            t for n, t in self.tasks.items() if n != NURSERY_MAIN_TASK_NAME
+        ]
+        children.extend(self._anonymous_tasks)
+        return children
+
     async def _wait_until_complete(self) -> None:
-        await asyncio.wait(
-            [t for n, t in self.tasks.items() if n != NURSERY_MAIN_TASK_NAME],
-            return_when=asyncio.ALL_COMPLETED,
-        )
+        children = self._children()
+        if not children:
+            return
+        await asyncio.wait(children, return_when=asyncio.ALL_COMPLETED)
 
     def get_task_by_name(self, name: str) -> Optional[asyncio.Task]:
         return self.tasks.get(name, None)
 
     async def __aenter__(self) -> "Nursery":
         self.tasks[NURSERY_MAIN_TASK_NAME] = get_current_task(loop=self._loop)
+        _live_nurseries.add(self)
+        if self.deadline is not None:
+            self.cancel_scope = CancelScope(
+                self.deadline, loop=self._loop, on_cancel=self._cancel_children
+            )
+            self.cancel_scope.__enter__()
         return self
 
-    async def __aexit__(self, *exc_info) -> None:
-        if exc_info[1]:
+    async def __aexit__(self, *exc_info) -> Optional[bool]:
+        scope = self.cancel_scope
+        cancelled_by_scope = False
+        if scope is not None:
+            # from now on the deadline only cancels children, not the body
+            scope._in_body = False
+            cancelled_by_scope = scope._task_cancelled and isinstance(
+                exc_info[1], asyncio.CancelledError
+            )
+
+        if exc_info[1] and not cancelled_by_scope:
             current_task = get_current_task(loop=self._loop)
             self.exception = {
                 "exception_obj": exc_info[1],
@@ -78,15 +176,22 @@ class Nursery(object):
             self._do_action_on_failure(current_task)
 
         await self._wait_until_complete()
+        _live_nurseries.discard(self)
+        if self.results is not None:
+            await self._finish_results(self.results, bool(exc_info[1]))
+
+        suppress = None
+        if scope is not None and scope.__exit__(*exc_info):
+            suppress = True
 
         if self.action_on_failure in (
             ActionOnFailure.IGNORE_WITHOUT_RAISE,
             ActionOnFailure.CANCEL_ALL_CHILDREN_WITHOUT_RAISE,
         ):
-            return
+            return suppress
 
         if not self.exception:
-            return
+            return suppress
 
         ex = self.exception["exception_obj"]
         if self.exception["task"] is self.tasks[NURSERY_MAIN_TASK_NAME]:
@@ -97,8 +202,23 @@ class Nursery(object):
                     "one of childrens raised an exception "
                     "in nursery, name: %s" % name
                 ) from ex
+        raise NurseryChildFailure(
+            "one of anonymous childrens raised an exception in nursery"
+        ) from ex
 
     def _task_done_hook(self, task: asyncio.Task) -> None:
+        self._anonymous_tasks.discard(task)
+        if _trace_hooks:
+            if task.cancelled():
+                trace("nursery.task_cancel", self, task)
+            elif task.exception() is not None:
+                trace("nursery.task_fail", self, task)
+            else:
+                trace("nursery.task_finish", self, task)
+        if self.results is not None:
+            self._push_result(task, self.results)
+        if self.metrics is not None:
+            self._record_done(task, self.metrics)
         try:
             if task.done() and task.exception() and not self.exception:
                 # set first raised exception on nursery
@@ -131,6 +251,108 @@ class Nursery(object):
             pass
 
     def _cancel_children(self) -> None:
-        for n, t in self.tasks.items():
-            if not t.done() and n != NURSERY_MAIN_TASK_NAME:
+        for t in self._children():
+            if not t.done():
                 t.cancel()
+                if self.metrics is not None:
+                    self._cancelled_by_nursery.add(t)
+
+    def _record_done(
+        self, task: asyncio.Task, metrics: NurseryMetrics
+    ) -> None:
+        if task.cancelled():
+            if task in self._cancelled_by_nursery:
+                self._cancelled_by_nursery.discard(task)
+                outcome: Optional[str] = "cancelled_by_nursery"
+            else:
+                outcome = "cancelled"
+        elif task.exception() is None:
+            outcome = None
+        elif self.action_on_failure in (
+            ActionOnFailure.IGNORE_WITHOUT_RAISE,
+            ActionOnFailure.IGNORE_AND_RAISE,
+        ):
+            outcome = "failure_ignored"
+        else:
+            outcome = "failure_cancelled_children"
+        metrics._on_done(task, self._loop.time(), outcome)
+
+    def _push_result(self, task: asyncio.Task, results: Channel) -> None:
+        exception: Optional[BaseException]
+        if task.cancelled():
+            result, exception = None, asyncio.CancelledError()
+        elif task.exception() is not None:
+            result, exception = None, task.exception()
+        else:
+            result, exception = task.result(), None
+        child_result = ChildResult(
+            self._task_names.get(task), task, result, exception
+        )
+        # keep the order of completions if a previous result is waiting
+        if not self._pending_results and results.send_nowait(child_result):
+            return
+        self._pending_results.append(child_result)
+        if self._results_flusher is None:
+            self._results_flusher = self._loop.create_task(
+                self._flush_results(results)
+            )
+
+    async def _flush_results(self, results: Channel) -> None:
+        try:
+            while self._pending_results:
+                child_result = self._pending_results.popleft()
+                if not await results.send(child_result):
+                    # results channel is closed
+                    self._pending_results.clear()
+        finally:
+            self._results_flusher = None
+
+    async def _finish_results(
+        self, results: Channel, body_failed: bool
+    ) -> None:
+        flusher = self._results_flusher
+        if flusher is not None:
+            if body_failed:
+                # nobody may be left to receive, drop undelivered results
+                flusher.cancel()
+                self._pending_results.clear()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                if not body_failed:
+                    raise
+        results.close()
+
+
+def find_child_name(task: asyncio.Task) -> Optional[str]:
+    """Returns the name of a task in the open nursery that started it
+
+    Can be called from other threads; anonymous children are reported as
+    "anonymous".
+    """
+    for _ in range(3):
+        try:
+            nurseries = list(_live_nurseries)
+            break
+        except RuntimeError:
+            # changed during iteration by the loop thread
+            continue
+    else:
+        return None
+    for nursery in nurseries:
+        name = nursery._task_names.get(task)
+        if name is not None:
+            return name
+        if task in nursery._anonymous_tasks:
+            return "anonymous"
+    # the body of a nursery that is not a child of another one
+    for nursery in nurseries:
+        if nursery.tasks.get(NURSERY_MAIN_TASK_NAME) is task:
+            return NURSERY_MAIN_TASK_NAME
+    return None
+
+
+def _coroutine_name(coro: Any) -> str:
+    return "<anonymous %s>" % getattr(
+        coro, "__qualname__", type(coro).__name__
+    )
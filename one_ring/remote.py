@@ -0,0 +1,377 @@
+import asyncio
+import collections
+import pickle
+import socket
+import struct
+from typing import Any, Deque, List, Optional, Tuple, Union
+
+from .csp import Channel, SendNoneToChannelError
+
+Address = Union[str, Tuple[str, int]]
+
+_HEADER = struct.Struct("!IB")
+_COUNT = struct.Struct("!I")
+
+# client -> server
+_DATA = 1
+_PULL = 2
+# server -> client
+_CREDIT = 3
+_ITEM = 4
+_CLOSED = 5
+
+
+class PickleCodec:
+    """Sends any picklable item, only for trusted peers
+
+    Decoding runs `pickle.loads` on what the peer sent, which can run
+    arbitrary code: it is the default on unix sockets only.
+    """
+
+    def encode(self, item: Any) -> bytes:
+        return pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class RawBytesCodec:
+    """Sends bytes as they are, the cheapest codec"""
+
+    def encode(self, item: Any) -> bytes:
+        if isinstance(item, bytes):
+            return item
+        if isinstance(item, (bytearray, memoryview)):
+            return bytes(item)
+        raise TypeError(
+            f"RawBytesCodec can only send bytes-like items, "
+            f"not {type(item).__name__}"
+        )
+
+    def decode(self, data: bytes) -> Any:
+        return data
+
+
+class MsgpackCodec:
+    """Needs the `msgpack` package"""
+
+    def __init__(self) -> None:
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError(
+                "MsgpackCodec needs msgpack, install it with "
+                "`pip install msgpack`"
+            ) from None
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def encode(self, item: Any) -> bytes:
+        return self._packb(item)
+
+    def decode(self, data: bytes) -> Any:
+        return self._unpackb(data)
+
+
+class _FrameWriter:
+    """Coalesces the frames written in one loop iteration into one write"""
+
+    def __init__(
+        self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        self._writer = writer
+        self._loop = loop
+        self._frames: List[bytes] = []
+
+    def write(self, kind: int, payload: bytes = b"") -> None:
+        if not self._frames:
+            self._loop.call_soon(self.flush)
+        self._frames.append(_HEADER.pack(len(payload), kind))
+        self._frames.append(payload)
+
+    def flush(self) -> None:
+        frames, self._frames = self._frames, []
+        if frames and not self._writer.is_closing():
+            self._writer.write(b"".join(frames))
+
+    async def drain(self) -> None:
+        await self._writer.drain()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    length, kind = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return kind, await reader.readexactly(length)
+
+
+def _is_tcp(writer: asyncio.StreamWriter) -> bool:
+    sock = writer.get_extra_info("socket")
+    return sock is not None and sock.family in (
+        socket.AF_INET,
+        socket.AF_INET6,
+    )
+
+
+def _set_nodelay(writer: asyncio.StreamWriter) -> None:
+    if _is_tcp(writer):
+        sock = writer.get_extra_info("socket")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def _codec_for_tcp(codec: Any) -> Any:
+    if codec is None:
+        # pickle would let any peer run code in this process
+        raise ValueError(
+            "pass a codec for TCP connections, PickleCodec is only safe "
+            "with trusted peers"
+        )
+    return codec
+
+
+class RemoteChannel:
+    """Client end of a channel that is served by `serve` on another process
+
+    `send` blocks while the client has no credit left; the server grants
+    one credit per item its channel accepted, so `full()` becomes True
+    when the remote channel is full and the window of in-flight items is
+    used up. Frames written in the same loop
+    iteration go out in one write. Items are delivered at most once.
+
+    `codec` defaults to `PickleCodec` on unix sockets, which is only for
+    trusted peers; TCP connections need an explicit codec.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        codec: Any = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self._loop = loop or asyncio.get_event_loop()
+        self._reader = reader
+        self._writer = writer
+        self._frames = _FrameWriter(writer, self._loop)
+        if _is_tcp(writer):
+            codec = _codec_for_tcp(codec)
+        self._codec = codec or PickleCodec()
+        self._credits: int = 0
+        self._senders: Deque[asyncio.Future] = collections.deque()
+        self._receivers: Deque[asyncio.Future] = collections.deque()
+        # items that arrived for cancelled receives
+        self._received: Deque[Any] = collections.deque()
+        self._closed_flag: bool = False
+        self._reader_task = self._loop.create_task(self._read_frames())
+
+    @classmethod
+    async def connect(
+        cls,
+        address: Address,
+        codec: Any = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> "RemoteChannel":
+        """Connects to a unix socket path or a (host, port) tuple"""
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            codec = _codec_for_tcp(codec)
+            reader, writer = await asyncio.open_connection(*address)
+            _set_nodelay(writer)
+        return cls(reader, writer, codec=codec, loop=loop)
+
+    def __repr__(self) -> str:
+        peer = self._writer.get_extra_info("peername")
+        return (
+            f"<{type(self).__name__} at {id(self):#x} peer={peer!r} "
+            f"credits={self._credits}>"
+        )
+
+    def full(self) -> bool:
+        """Return True if the remote channel can not take more items."""
+        return self._credits <= 0
+
+    def is_closed(self) -> bool:
+        return self._closed_flag
+
+    def close(self) -> None:
+        "Closes the connection, the served channel stays open"
+        if self._closed_flag:
+            return
+        self._closed_flag = True
+        self._frames.flush()
+        self._writer.close()
+        self._reader_task.cancel()
+        _wakeup_all(self._senders, None)
+        _wakeup_all(self._receivers, None)
+
+    def send_nowait(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        if self._closed_flag or self._credits <= 0:
+            return False
+        self._credits -= 1
+        self._frames.write(_DATA, self._codec.encode(item))
+        return True
+
+    async def send(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        while not self.send_nowait(item):
+            if self._closed_flag:
+                return False
+            waiter = self._loop.create_future()
+            self._senders.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                raise
+        return True
+
+    async def receive(self) -> Any:
+        if self._received:
+            return self._received.popleft()
+        if self._closed_flag:
+            return None
+        waiter = self._loop.create_future()
+        self._receivers.append(waiter)
+        self._frames.write(_PULL, _COUNT.pack(1))
+        return await waiter
+
+    async def _read_frames(self) -> None:
+        try:
+            while True:
+                kind, payload = await _read_frame(self._reader)
+                if kind == _CREDIT:
+                    (credits,) = _COUNT.unpack(payload)
+                    self._credits += credits
+                    _wakeup_all(self._senders, None)
+                elif kind == _ITEM:
+                    self._on_item(self._codec.decode(payload))
+                elif kind == _CLOSED:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if not self._closed_flag:
+                self.close()
+
+    def _on_item(self, item: Any) -> None:
+        while self._receivers:
+            receiver = self._receivers.popleft()
+            if not receiver.done():
+                receiver.set_result(item)
+                return
+        # its receive was cancelled, keep it for the next one
+        self._received.append(item)
+
+
+def _wakeup_all(waiters: Deque[asyncio.Future], result: Any) -> None:
+    while waiters:
+        waiter = waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(result)
+
+
+class _ServedConnection:
+    def __init__(
+        self,
+        channel: Channel,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        codec: Any,
+        window: int,
+    ) -> None:
+        self._loop = asyncio.get_event_loop()
+        self._channel = channel
+        self._reader = reader
+        self._writer = writer
+        self._frames = _FrameWriter(writer, self._loop)
+        self._codec = codec
+        self._window = window
+        self._incoming: Channel = Channel(maxsize=window)
+        self._pulls: int = 0
+        self._puller: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        _set_nodelay(self._writer)
+        self._frames.write(_CREDIT, _COUNT.pack(self._window))
+        pusher = self._loop.create_task(self._push())
+        disconnected = False
+        try:
+            while True:
+                kind, payload = await _read_frame(self._reader)
+                if kind == _DATA:
+                    # the client never sends more than its credits
+                    self._incoming.send_nowait(self._codec.decode(payload))
+                elif kind == _PULL:
+                    (count,) = _COUNT.unpack(payload)
+                    self._pulls += count
+                    if self._puller is None:
+                        self._puller = self._loop.create_task(self._pull())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            disconnected = True
+        finally:
+            if self._puller is not None:
+                self._puller.cancel()
+            self._frames.flush()
+            self._writer.close()
+            if disconnected:
+                # the client was told these items are sent, deliver them
+                # unless the served channel is closed
+                self._incoming.close()
+                await pusher
+            else:
+                pusher.cancel()
+
+    async def _push(self) -> None:
+        while True:
+            item = await self._incoming.receive()
+            if item is None:
+                # the connection is closed and every item is delivered
+                return
+            if not await self._channel.send(item):
+                self._frames.write(_CLOSED)
+                return
+            self._frames.write(_CREDIT, _COUNT.pack(1))
+
+    async def _pull(self) -> None:
+        try:
+            while self._pulls:
+                item = await self._channel.receive()
+                if item is None:
+                    self._frames.write(_CLOSED)
+                    return
+                self._pulls -= 1
+                self._frames.write(_ITEM, self._codec.encode(item))
+                await self._frames.drain()
+        finally:
+            self._puller = None
+
+
+async def serve(
+    channel: Channel,
+    address: Address,
+    codec: Any = None,
+    window: Optional[int] = None,
+) -> asyncio.AbstractServer:
+    """Serves a channel to RemoteChannel clients
+
+    `address` is a unix socket path or a (host, port) tuple. Every client
+    can have `window` items (the maxsize of the channel by default) in
+    flight that the channel did not accept yet.
+
+    `codec` defaults to `PickleCodec` on a unix socket, which is only for
+    trusted peers; a TCP address needs an explicit codec, such as
+    `RawBytesCodec` or `MsgpackCodec`.
+    """
+    if not isinstance(address, str):
+        codec = _codec_for_tcp(codec)
+    codec = codec or PickleCodec()
+    window = window or max(channel.maxsize, 1)
+
+    async def on_connection(reader, writer):
+        await _ServedConnection(channel, reader, writer, codec, window).run()
+
+    if isinstance(address, str):
+        return await asyncio.start_unix_server(on_connection, address)
+    return await asyncio.start_server(on_connection, *address)
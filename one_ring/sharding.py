@@ -0,0 +1,273 @@
+import asyncio
+import multiprocessing
+import os
+import traceback
+from multiprocessing.connection import Connection, wait
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
+
+from .csp import Channel
+from .nursery import Nursery, NurseryChildFailure, ActionOnFailure
+
+_EOF = "__one_ring_shard_eof__"
+_BATCH_SIZE = 1024
+
+Pipes = Dict[Tuple[int, int], Tuple[Connection, Connection]]
+
+
+class ShardFailure(Exception):
+    """Stands for an exception of a shard that could not be pickled"""
+
+
+class Shard:
+    """Handle that is passed to the main coroutine of every shard
+
+    Items sent to `outbox(peer)` are received from the `inbox` of the peer
+    shard. The inbox is closed when all of the other shards are finished.
+    """
+
+    def __init__(
+        self, shard_id: int, workers: int, inbox: Channel, outboxes
+    ) -> None:
+        self.shard_id: int = shard_id
+        self.workers: int = workers
+        self.inbox: Channel = inbox
+        self._outboxes: Dict[int, Channel] = outboxes
+
+    @property
+    def peers(self) -> List[int]:
+        return sorted(self._outboxes)
+
+    def outbox(self, shard_id: int) -> Channel:
+        """Channel that carries items to the inbox of another shard"""
+        try:
+            return self._outboxes[shard_id]
+        except KeyError:
+            raise ValueError(
+                "there is no such peer shard.", {"shard_id": shard_id}
+            ) from None
+
+
+async def _pump_out(outbox: Channel, conn: Connection) -> None:
+    loop = asyncio.get_event_loop()
+    try:
+        while True:
+            item = await outbox.receive()
+            if item is None:
+                break
+            # coalesce everything that is already buffered into one message
+            batch = [item]
+            while len(batch) < _BATCH_SIZE:
+                item = outbox.receive_nowait()
+                if item is None:
+                    break
+                batch.append(item)
+            await loop.run_in_executor(None, conn.send, batch)
+        await loop.run_in_executor(None, conn.send, _EOF)
+    except (BrokenPipeError, ConnectionResetError):
+        # the peer is gone, sending to it works like a closed channel
+        outbox.close()
+    finally:
+        conn.close()
+
+
+class _InboxFeeder:
+    def __init__(
+        self,
+        inbox: Channel,
+        conns: List[Connection],
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self._inbox = inbox
+        self._loop = loop
+        self._open = len(conns)
+        self._draining = 0
+        if not conns:
+            inbox.close()
+        for conn in conns:
+            loop.add_reader(conn.fileno(), self._on_readable, conn)
+
+    def _on_readable(self, conn: Connection) -> None:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            message = _EOF
+        if message == _EOF:
+            self._loop.remove_reader(conn.fileno())
+            conn.close()
+            self._open -= 1
+            self._close_if_finished()
+            return
+        for i, item in enumerate(message):
+            if not self._inbox.send_nowait(item):
+                # inbox is full, stop reading so the peer feels backpressure
+                self._loop.remove_reader(conn.fileno())
+                self._draining += 1
+                self._loop.create_task(self._drain(conn, message[i:]))
+                return
+
+    async def _drain(self, conn: Connection, backlog: List[Any]) -> None:
+        try:
+            for item in backlog:
+                if not await self._inbox.send(item):
+                    break
+        finally:
+            self._draining -= 1
+        self._loop.add_reader(conn.fileno(), self._on_readable, conn)
+
+    def _close_if_finished(self) -> None:
+        if self._open == 0 and self._draining == 0:
+            self._inbox.close()
+
+
+async def _run_shard(
+    main: Callable[[Shard], Awaitable[Any]],
+    shard_id: int,
+    workers: int,
+    pipes: Pipes,
+    inbox_size: int,
+) -> Any:
+    loop = asyncio.get_event_loop()
+    inbox = Channel(maxsize=inbox_size)
+    outboxes = {
+        dst: Channel(maxsize=inbox_size)
+        for (src, dst) in pipes
+        if src == shard_id
+    }
+    _InboxFeeder(
+        inbox,
+        [r for (src, dst), (r, _) in pipes.items() if dst == shard_id],
+        loop,
+    )
+    async with Nursery(ActionOnFailure.CANCEL_ALL_CHILDREN_AND_RAISE) as n:
+        for dst, outbox in outboxes.items():
+            n.start(_pump_out(outbox, pipes[(shard_id, dst)][1]))
+        try:
+            return await main(Shard(shard_id, workers, inbox, outboxes))
+        finally:
+            for outbox in outboxes.values():
+                outbox.close()
+
+
+def _shard_entry(
+    main: Callable[[Shard], Awaitable[Any]],
+    shard_id: int,
+    workers: int,
+    pipes: Pipes,
+    inbox_size: int,
+    result_conn: Connection,
+) -> None:
+    # keep only the ends of the pipes that belong to this shard
+    for (src, dst), (r, w) in pipes.items():
+        if dst != shard_id:
+            r.close()
+        if src != shard_id:
+            w.close()
+    pipes = {k: v for k, v in pipes.items() if shard_id in k}
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        result = loop.run_until_complete(
+            _run_shard(main, shard_id, workers, pipes, inbox_size)
+        )
+        result_conn.send((True, result))
+    except KeyboardInterrupt:
+        pass
+    except BaseException as e:
+        try:
+            result_conn.send((False, e))
+        except Exception:
+            result_conn.send(
+                (
+                    False,
+                    ShardFailure(
+                        "".join(traceback.format_exception(type(e), e, None))
+                    ),
+                )
+            )
+    finally:
+        result_conn.close()
+        loop.close()
+
+
+def run_sharded(
+    main: Callable[[Shard], Awaitable[Any]],
+    workers: Optional[int] = None,
+    inbox_size: int = 1024,
+    start_method: Optional[str] = None,
+) -> List[Any]:
+    """Runs `main(shard)` in its own event loop on `workers` processes
+
+    Returns the results of the shards ordered by shard id. If a shard fails,
+    the others are terminated and NurseryChildFailure is raised, the same
+    as a nursery with CANCEL_ALL_CHILDREN_AND_RAISE.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("number of workers must be a positive number")
+    # Process is only declared on the concrete contexts
+    ctx: Any = multiprocessing.get_context(start_method)
+    pipes: Pipes = {
+        (src, dst): ctx.Pipe(duplex=False)
+        for src in range(workers)
+        for dst in range(workers)
+        if src != dst
+    }
+    result_conns = []
+    processes = []
+    for shard_id in range(workers):
+        r, w = ctx.Pipe(duplex=False)
+        p = ctx.Process(
+            target=_shard_entry,
+            args=(main, shard_id, workers, pipes, inbox_size, w),
+            name="one_ring-shard-%s" % shard_id,
+        )
+        p.start()
+        w.close()
+        result_conns.append(r)
+        processes.append(p)
+    for r, w in pipes.values():
+        r.close()
+        w.close()
+
+    results: List[Any] = [None] * workers
+    pending = {r: shard_id for shard_id, r in enumerate(result_conns)}
+    try:
+        while pending:
+            # only connections are waited for
+            for conn in cast(List[Connection], wait(list(pending))):
+                shard_id = pending.pop(conn)
+                try:
+                    ok, value = conn.recv()
+                except EOFError:
+                    ok, value = False, ShardFailure(
+                        "shard exited with code %s"
+                        % processes[shard_id].exitcode
+                    )
+                conn.close()
+                if not ok:
+                    raise NurseryChildFailure(
+                        "one of shards raised an exception, shard: %s"
+                        % shard_id
+                    ) from value
+                results[shard_id] = value
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for conn in pending:
+            conn.close()
+        for p in processes:
+            if p.is_alive() and pending:
+                p.terminate()
+            p.join()
+    return results
@@ -0,0 +1,387 @@
+"""Channel between two processes over a shared memory ring buffer
+
+Requires Python 3.8+ (`multiprocessing.shared_memory`).
+"""
+
+import asyncio
+import collections
+import multiprocessing
+import os
+import struct
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Deque, Optional, Tuple
+
+from .csp import ReceiveAction, SendAction, SendNoneToChannelError
+
+# indexes of 8 byte words of the header, every word is on its own line
+_HEAD = 0
+_TAIL = 8
+_RECEIVER_PARKED = 16
+_SENDER_PARKED = 24
+_CLOSED = 32
+_HEADER_SIZE = 40 * 8
+_LENGTH = struct.Struct("Q")
+# a parked side checks the ring again after this delay, in case a doorbell
+# was missed because Python can not put a memory fence between processes
+_POLL_INTERVAL = 0.05
+
+
+class _Parking:
+    """Waiters of one end of the ring and the doorbell that wakes them"""
+
+    def __init__(
+        self,
+        channel: "SharedMemoryChannel",
+        flag: int,
+        bell: Connection,
+        ready: Callable[[], bool],
+    ) -> None:
+        self._channel = channel
+        self._flag = flag
+        self._bell = bell
+        self._ready = ready
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poll_handle: Optional[asyncio.TimerHandle] = None
+        self.waiters: Deque[asyncio.Future] = collections.deque()
+
+    def park(self, waiter: asyncio.Future) -> None:
+        self.waiters.append(waiter)
+        header = self._channel._header
+        header[self._flag] = 1
+        # the other side may have moved before it could see the flag
+        if self._ready():
+            header[self._flag] = 0
+            self.wakeup()
+            return
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        if self._poll_handle is None:
+            self._loop.add_reader(self._bell.fileno(), self._on_bell)
+            self._poll_handle = self._loop.call_later(
+                _POLL_INTERVAL, self._on_poll
+            )
+
+    def _on_bell(self) -> None:
+        try:
+            while os.read(self._bell.fileno(), 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self.wakeup()
+
+    def _on_poll(self) -> None:
+        assert self._loop is not None
+        self._poll_handle = None
+        if self._ready():
+            self.wakeup()
+        elif self.waiters:
+            self._poll_handle = self._loop.call_later(
+                _POLL_INTERVAL, self._on_poll
+            )
+
+    def wakeup(self) -> None:
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        self.disarm()
+
+    def disarm(self) -> None:
+        if self._poll_handle is not None:
+            assert self._loop is not None
+            self._poll_handle.cancel()
+            self._poll_handle = None
+            self._loop.remove_reader(self._bell.fileno())
+
+
+class SharedMemoryChannel:
+    """Single producer, single consumer channel of bytes between processes
+
+    The channel is a ring of `slots` fixed size slots in shared memory.
+    `send` copies the payload into the next slot, `receive` returns a
+    memoryview of the slot itself (no copy), which stays valid until the
+    next receive or `release`. Create it with `create` and pass it to the
+    other process (as an argument of `multiprocessing.Process`); one
+    process must only send and the other one must only receive.
+
+    The consumer can use it in `select` like a channel (`R()`, `S()`).
+    """
+
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        slots: int,
+        slot_size: int,
+        data_bell: Tuple[Connection, Connection],
+        space_bell: Tuple[Connection, Connection],
+        owner: bool = False,
+    ) -> None:
+        self._shm = shm
+        self._slots = slots
+        self._slot_size = slot_size
+        self._stride = _LENGTH.size + slot_size
+        self._data_bell = data_bell
+        self._space_bell = space_bell
+        self._owner = owner
+        buf = shm.buf
+        assert buf is not None
+        self._buf: memoryview = buf
+        self._header = buf[:_HEADER_SIZE].cast("Q")
+        self._holding: bool = False
+        self._select_receivers: Deque[asyncio.Future] = collections.deque()
+        for conn in data_bell + space_bell:
+            os.set_blocking(conn.fileno(), False)
+        self._receivers = _Parking(
+            self, _RECEIVER_PARKED, data_bell[0], self._can_receive
+        )
+        self._senders = _Parking(
+            self, _SENDER_PARKED, space_bell[0], self._can_send
+        )
+
+    @classmethod
+    def create(
+        cls, slots: int = 64, slot_size: int = 64 * 1024
+    ) -> "SharedMemoryChannel":
+        if slots < 1 or slot_size < 1:
+            raise ValueError("slots and slot_size must be positive numbers")
+        size = _HEADER_SIZE + slots * (_LENGTH.size + slot_size)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        assert shm.buf is not None
+        shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+        return cls(
+            shm,
+            slots,
+            slot_size,
+            multiprocessing.Pipe(duplex=False),
+            multiprocessing.Pipe(duplex=False),
+            owner=True,
+        )
+
+    @classmethod
+    def _attach(cls, name, slots, slot_size, data_bell, space_bell):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before 3.13 attaching registers the segment to be unlinked
+            # when this process exits, the creator owns it
+            from multiprocessing import resource_tracker
+
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, slots, slot_size, data_bell, space_bell)
+
+    def __reduce__(self):
+        return (
+            SharedMemoryChannel._attach,
+            (
+                self._shm.name,
+                self._slots,
+                self._slot_size,
+                self._data_bell,
+                self._space_bell,
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__} at {id(self):#x} "
+            f"name={self._shm.name!r} slots={self._slots!r} "
+            f"slot_size={self._slot_size!r} size={self.size()}>"
+        )
+
+    @property
+    def maxsize(self) -> int:
+        """Number of slots of the ring."""
+        return self._slots
+
+    @property
+    def slot_size(self) -> int:
+        """Maximum number of bytes of an item."""
+        return self._slot_size
+
+    def size(self) -> int:
+        """Number of items in channel."""
+        head = self._header[_HEAD] + (1 if self._holding else 0)
+        return self._header[_TAIL] - head
+
+    def empty(self) -> bool:
+        return self.size() == 0
+
+    def full(self) -> bool:
+        return not self._can_send()
+
+    def is_closed(self) -> bool:
+        return bool(self._header[_CLOSED])
+
+    def close(self) -> None:
+        "Closes the channel, the receiver still gets the remaining items"
+        if self.is_closed():
+            return
+        self._header[_CLOSED] = 1
+        self._ring(self._data_bell[1])
+        self._ring(self._space_bell[1])
+        self._receivers.wakeup()
+        self._senders.wakeup()
+
+    def _can_receive(self) -> bool:
+        return self.size() > 0 or self.is_closed()
+
+    def _can_send(self) -> bool:
+        header = self._header
+        used = header[_TAIL] - header[_HEAD]
+        return used < self._slots or self.is_closed()
+
+    def _slot_offset(self, index: int) -> int:
+        return _HEADER_SIZE + (index % self._slots) * self._stride
+
+    @staticmethod
+    def _ring(bell: Connection) -> None:
+        try:
+            os.write(bell.fileno(), b"\0")
+        except (BlockingIOError, OSError):
+            # the pipe is full, so the other side has a pending wakeup
+            pass
+
+    def send_nowait(self, item: Any) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        if len(item) > self._slot_size:
+            raise ValueError(
+                "item is larger than slot size",
+                {"size": len(item), "slot_size": self._slot_size},
+            )
+        header = self._header
+        if self.is_closed():
+            return False
+        tail = header[_TAIL]
+        if tail - header[_HEAD] >= self._slots:
+            return False
+        offset = self._slot_offset(tail)
+        start = offset + _LENGTH.size
+        self._buf[start : start + len(item)] = item
+        _LENGTH.pack_into(self._buf, offset, len(item))
+        header[_TAIL] = tail + 1
+        if header[_RECEIVER_PARKED]:
+            header[_RECEIVER_PARKED] = 0
+            self._ring(self._data_bell[1])
+        return True
+
+    async def send(
+        self, item: Any, future: Optional[asyncio.Future] = None
+    ) -> bool:
+        if item is None:
+            raise SendNoneToChannelError
+        loop = asyncio.get_event_loop()
+        while True:
+            if future is not None and future.done():
+                return False
+            if self.is_closed():
+                if future is not None:
+                    future.set_result((self, None))
+                return False
+            if self._can_send():
+                break
+            waiter = loop.create_future()
+            self._senders.park(waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                raise
+        is_done = self.send_nowait(item)
+        if future is not None:
+            future.set_result((self, item))
+        return is_done
+
+    def release(self) -> None:
+        """Gives the slot of the last received item back to the sender"""
+        if not self._holding:
+            return
+        self._holding = False
+        header = self._header
+        header[_HEAD] += 1
+        if header[_SENDER_PARKED]:
+            header[_SENDER_PARKED] = 0
+            self._ring(self._space_bell[1])
+
+    def receive_nowait(self) -> Optional[memoryview]:
+        self.release()
+        header = self._header
+        head = header[_HEAD]
+        if header[_TAIL] <= head:
+            return None
+        offset = self._slot_offset(head)
+        (length,) = _LENGTH.unpack_from(self._buf, offset)
+        self._holding = True
+        start = offset + _LENGTH.size
+        return self._buf[start : start + length]
+
+    def add_future_to_receivers(self, f: asyncio.Future) -> None:
+        self._select_receivers.append(f)
+        self._serve_select()
+
+    def remove_future_from_receivers(self, f: asyncio.Future) -> None:
+        try:
+            self._select_receivers.remove(f)
+        except ValueError:
+            pass
+
+    def _serve_select(self, *_) -> None:
+        waiters = self._select_receivers
+        while waiters:
+            if waiters[0].done():
+                waiters.popleft()
+                continue
+            item = self.receive_nowait()
+            if item is None and not self.is_closed():
+                if not self._receivers.waiters:
+                    waiter = asyncio.get_event_loop().create_future()
+                    waiter.add_done_callback(self._serve_select)
+                    self._receivers.park(waiter)
+                return
+            waiters.popleft().set_result((self, item))
+
+    async def receive(self, future: Optional[asyncio.Future] = None) -> Any:
+        loop = asyncio.get_event_loop()
+        while True:
+            item = self.receive_nowait()
+            if item is not None or self.is_closed():
+                break
+            waiter = loop.create_future()
+            self._receivers.park(waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                raise
+        if future is not None:
+            future.set_result(item)
+        return item
+
+    def R(self, callback=None) -> ReceiveAction:
+        return ReceiveAction(channel=self, callback=callback)
+
+    def S(self, item: Any, callback=None) -> SendAction:
+        return SendAction(channel=self, item=item, callback=callback)
+
+    def detach(self) -> None:
+        """Releases the mapping of the shared memory in this process"""
+        self._receivers.disarm()
+        self._senders.disarm()
+        self._holding = False
+        self._header.release()
+        try:
+            self._shm.close()
+        except BufferError:
+            # received items still hold views of it, the mapping goes away
+            # with the last one
+            pass
+
+    def unlink(self) -> None:
+        """Detaches and destroys the shared memory (creator only)"""
+        try:
+            self.detach()
+        finally:
+            if self._owner:
+                self._shm.unlink()
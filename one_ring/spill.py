@@ -0,0 +1,131 @@
+import asyncio
+import collections
+import mmap
+import pickle
+import struct
+import tempfile
+from typing import Any, Callable, Deque, Optional
+
+from .csp import Channel
+from .metrics import enable_metrics
+
+_LENGTH = struct.Struct("I")
+
+
+class _Segment:
+    """Memory mapped temporary file of length prefixed records"""
+
+    def __init__(self, size: int, directory: Optional[str]) -> None:
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self.size = size
+        self.write_pos: int = 0
+        self.read_pos: int = 0
+
+    def append(self, record: bytes) -> bool:
+        end = self.write_pos + _LENGTH.size + len(record)
+        if end > self.size:
+            return False
+        _LENGTH.pack_into(self._map, self.write_pos, len(record))
+        self._map[self.write_pos + _LENGTH.size : end] = record
+        self.write_pos = end
+        return True
+
+    def pop(self) -> bytes:
+        (length,) = _LENGTH.unpack_from(self._map, self.read_pos)
+        start = self.read_pos + _LENGTH.size
+        self.read_pos = start + length
+        return self._map[start : self.read_pos]
+
+    def drained(self) -> bool:
+        return self.read_pos == self.write_pos
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class SpillChannel(Channel):
+    """Channel that never blocks senders and keeps its memory use flat
+
+    Up to `memory_items` items are kept in memory (that is its `maxsize`),
+    the rest are serialized into memory mapped segment files in `directory`
+    and read back in FIFO order. Segment files are temporary and removed
+    as soon as they are read.
+    """
+
+    def __init__(
+        self,
+        memory_items: int = 1024,
+        directory: Optional[str] = None,
+        segment_size: int = 64 * 1024 * 1024,
+        dumps: Callable[[Any], bytes] = pickle.dumps,
+        loads: Callable[[bytes], Any] = pickle.loads,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        name: Optional[str] = None,
+        metrics: bool = False,
+        latency: bool = False,
+    ) -> None:
+        if memory_items < 1:
+            raise ValueError("memory_items must be a positive number")
+        super().__init__(maxsize=memory_items, loop=loop, name=name)
+        self._directory = directory
+        self._segment_size = segment_size
+        self._dumps = dumps
+        self._loads = loads
+        self._segments: Deque[_Segment] = collections.deque()
+        self._spilled: int = 0
+        if metrics or latency:
+            enable_metrics(self, latency=latency)
+
+    def _put(self, item: Any) -> None:
+        # once items are spilled, new ones go behind them to keep FIFO
+        if not self._spilled and len(self._data) < self._maxsize:
+            self._data.append(item)
+            return
+        record = self._dumps(item)
+        if not self._segments or not self._segments[-1].append(record):
+            segment = _Segment(
+                max(self._segment_size, _LENGTH.size + len(record)),
+                self._directory,
+            )
+            segment.append(record)
+            self._segments.append(segment)
+        self._spilled += 1
+
+    def _get(self) -> Any:
+        item = self._data.popleft()
+        if self._spilled:
+            # spilled items are newer than everything in memory
+            self._data.append(self._unspill())
+        return item
+
+    def _unspill(self) -> Any:
+        segment = self._segments[0]
+        item = self._loads(segment.pop())
+        self._spilled -= 1
+        if segment.drained():
+            if len(self._segments) > 1:
+                self._segments.popleft().close()
+            else:
+                segment.read_pos = segment.write_pos = 0
+        return item
+
+    def size(self) -> int:
+        """Number of items in channel (in memory and on disk)."""
+        return len(self._data) + self._spilled
+
+    def spilled(self) -> int:
+        """Number of items on disk."""
+        return self._spilled
+
+    def full(self) -> bool:
+        """A spill channel is never full."""
+        return False
+
+    def release(self) -> None:
+        """Removes the segment files, the spilled items are lost"""
+        while self._segments:
+            self._segments.popleft().close()
+        self._spilled = 0
@@ -0,0 +1,89 @@
+import asyncio
+import selectors
+from typing import Any, Awaitable, List, Mapping, Optional, Tuple
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop with a virtual clock for tests and simulations
+
+    `time()` does not follow the wall clock: when nothing is ready to run
+    and the loop would wait for its next timer, the clock jumps straight
+    to that timer instead. Sleeps, `Timeout`s, deadlines and `call_later`
+    take no real time, and their order is deterministic.
+
+    File descriptors are still polled, so callbacks from threads
+    (`call_soon_threadsafe`, `run_in_executor`) work, but the clock does
+    not wait for them: only use it for code that waits on timers or on
+    other tasks, not on I/O or threads that race with timers.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._virtual_time = start
+        super().__init__(_VirtualTimeSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float) -> None:
+        """Moves the clock forward, timers that are due run on next step"""
+        if seconds < 0:
+            raise ValueError("virtual time can not go backwards")
+        self._virtual_time += seconds
+
+
+class _VirtualTimeSelector(selectors.BaseSelector):
+    """Polls the real selector and advances the clock by the timeout"""
+
+    def __init__(self, loop: VirtualTimeEventLoop) -> None:
+        self._loop = loop
+        self._selector = selectors.DefaultSelector()
+
+    def register(
+        self, fileobj: Any, events: int, data: Any = None
+    ) -> selectors.SelectorKey:
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj: Any) -> selectors.SelectorKey:
+        return self._selector.unregister(fileobj)
+
+    def modify(
+        self, fileobj: Any, events: int, data: Any = None
+    ) -> selectors.SelectorKey:
+        return self._selector.modify(fileobj, events, data)
+
+    def select(
+        self, timeout: Optional[float] = None
+    ) -> List[Tuple[selectors.SelectorKey, int]]:
+        if timeout is None:
+            # no timers at all, only I/O (or another thread) can wake it up
+            return self._selector.select()
+        events = self._selector.select(0)
+        if not events and timeout > 0:
+            loop = self._loop
+            # jump to the next timer, not by the timeout: its float can
+            # round to just before the timer
+            scheduled = loop._scheduled  # type: ignore
+            if scheduled:
+                loop._virtual_time = max(
+                    loop._virtual_time, scheduled[0].when()
+                )
+            else:
+                loop._virtual_time += timeout
+        return events
+
+    def close(self) -> None:
+        self._selector.close()
+
+    def get_map(self) -> Mapping[Any, selectors.SelectorKey]:
+        return self._selector.get_map()
+
+
+def run_virtual(main_coro: Awaitable[Any], start: float = 0.0) -> Any:
+    """Runs a coroutine to completion on a new VirtualTimeEventLoop"""
+    loop = VirtualTimeEventLoop(start)
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(main_coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
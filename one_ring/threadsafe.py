@@ -0,0 +1,145 @@
+import asyncio
+import collections
+import concurrent.futures
+import threading
+from typing import Any, Deque, Optional, Tuple
+
+from .csp import Channel, SendNoneToChannelError
+
+_SEND = True
+_RECEIVE = False
+
+
+class ThreadSafeChannel(Channel):
+    """Channel that can be used from other threads as well as its loop
+
+    On the loop thread it is a regular channel (it works with `select`).
+    Other threads use `send_blocking`, `receive_blocking` and
+    `send_threadsafe`; their requests are staged under a lock and handed
+    to the loop by a single `call_soon_threadsafe` per burst.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        super().__init__(maxsize=maxsize, loop=loop)
+        self._lock = threading.Lock()
+        self._staged: Deque[Tuple[bool, Any, concurrent.futures.Future]]
+        self._staged = collections.deque()
+        self._wakeup_scheduled: bool = False
+        # requests of threads that are waiting on the loop side
+        self._thread_senders: Deque[Tuple[Any, concurrent.futures.Future]]
+        self._thread_senders = collections.deque()
+        self._thread_receivers: Deque[concurrent.futures.Future]
+        self._thread_receivers = collections.deque()
+        self._feeder: Optional[asyncio.Task] = None
+        self._taker: Optional[asyncio.Task] = None
+
+    def send_threadsafe(self, item: Any) -> concurrent.futures.Future:
+        """Queues a send from any thread
+
+        The returned future resolves to the result of `send`. Items of one
+        thread are delivered in the order they were queued.
+        """
+        if item is None:
+            raise SendNoneToChannelError
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._stage(_SEND, item, future)
+        return future
+
+    def send_blocking(self, item: Any) -> bool:
+        """Sends an item from a thread, blocks until the channel takes it"""
+        self._check_not_loop_thread()
+        return self.send_threadsafe(item).result()
+
+    def receive_blocking(self) -> Any:
+        """Receives an item from a thread, blocks until there is one"""
+        self._check_not_loop_thread()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._stage(_RECEIVE, None, future)
+        return future.result()
+
+    def close_threadsafe(self) -> None:
+        """Closes the channel from any thread"""
+        self._loop.call_soon_threadsafe(self.close)
+
+    def _check_not_loop_thread(self) -> None:
+        if asyncio._get_running_loop() is self._loop:
+            raise RuntimeError(
+                "blocking calls on the loop thread would deadlock, "
+                "use send/receive instead"
+            )
+
+    def _stage(
+        self, op: bool, item: Any, future: concurrent.futures.Future
+    ) -> None:
+        with self._lock:
+            self._staged.append((op, item, future))
+            if self._wakeup_scheduled:
+                return
+            self._wakeup_scheduled = True
+        self._loop.call_soon_threadsafe(self._process_staged)
+
+    def _process_staged(self) -> None:
+        with self._lock:
+            staged, self._staged = self._staged, collections.deque()
+            self._wakeup_scheduled = False
+        for op, item, future in staged:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if op is _SEND:
+                self._thread_senders.append((item, future))
+            else:
+                self._thread_receivers.append(future)
+        self._serve_threads()
+
+    def _serve_threads(self) -> None:
+        # hand over without a task as long as the channel does not block
+        senders = self._thread_senders
+        while senders and self._feeder is None:
+            item, future = senders[0]
+            if self.is_closed():
+                is_done = False
+            elif not self.send_nowait(item):
+                break
+            else:
+                is_done = True
+            senders.popleft()
+            future.set_result(is_done)
+        if senders and self._feeder is None:
+            self._feeder = self._loop.create_task(self._feed())
+
+        receivers = self._thread_receivers
+        while receivers and self._taker is None:
+            item = self.receive_nowait()
+            if item is None and not self.is_closed():
+                break
+            receivers.popleft().set_result(item)
+        if receivers and self._taker is None:
+            self._taker = self._loop.create_task(self._take())
+
+    async def _feed(self) -> None:
+        try:
+            while self._thread_senders:
+                item, future = self._thread_senders.popleft()
+                try:
+                    future.set_result(await self.send(item))
+                except BaseException as e:
+                    future.set_exception(e)
+                    raise
+        finally:
+            self._feeder = None
+
+    async def _take(self) -> None:
+        try:
+            while self._thread_receivers:
+                future = self._thread_receivers.popleft()
+                try:
+                    future.set_result(await self.receive())
+                except BaseException as e:
+                    future.set_exception(e)
+                    raise
+        finally:
+            self._taker = None
@@ -0,0 +1,139 @@
+"""Hooks for channel, select and nursery events
+
+A hook is called as `hook(event, source, data)`:
+
+- ``channel.send``, ``channel.receive``: `source` is the channel and `data`
+  the item
+- ``channel.block_send``, ``channel.unblock_send``,
+  ``channel.block_receive``, ``channel.unblock_receive``, ``channel.close``:
+  `data` is None
+- ``select.won``: `source` is the channel of the case that won and `data`
+  the number of cases
+- ``nursery.task_start``, ``nursery.task_finish``, ``nursery.task_fail``,
+  ``nursery.task_cancel``: `source` is the nursery and `data` the task
+
+Hooks run synchronously inside the operation, so they must be fast and
+must not raise. Without hooks the cost is a check of an empty list.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .asyncio_sugar import get_current_task
+from .metrics import channel_name
+
+Hook = Callable[[str, Any, Any], None]
+
+_hooks: List[Hook] = []
+
+
+def add_hook(hook: Hook) -> None:
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    try:
+        _hooks.remove(hook)
+    except ValueError:
+        pass
+
+
+def emit(event: str, source: Any, data: Any = None) -> None:
+    for hook in _hooks:
+        hook(event, source, data)
+
+
+_BEGIN = {
+    "channel.block_send": "blocked on send",
+    "channel.block_receive": "blocked on receive",
+}
+_END = {
+    "channel.unblock_send": "blocked on send",
+    "channel.unblock_receive": "blocked on receive",
+}
+
+
+class ChromeTraceRecorder:
+    """Records events in the Chrome trace event format
+
+    Every task gets its own track: the lifetime of nursery children and
+    the time tasks are blocked on channels are shown as slices, the other
+    events as instants. Load the file written by `save` in
+    chrome://tracing or https://ui.perfetto.dev. Use it as a context
+    manager to register it as a hook.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self._pid = os.getpid()
+        self._started = time.perf_counter()
+        self._tids: Dict[Any, int] = {}
+
+    def __enter__(self) -> "ChromeTraceRecorder":
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        remove_hook(self)
+
+    def _tid(self, task: Optional[asyncio.Task], name: Optional[str]) -> int:
+        key = task if task is not None else threading.get_ident()
+        tid = self._tids.get(key)
+        if tid is None:
+            tid = self._tids[key] = len(self._tids) + 1
+            if name is None:
+                name = _task_name(task) if task is not None else "callbacks"
+            self.events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        return tid
+
+    def __call__(self, event: str, source: Any, data: Any) -> None:
+        ts = (time.perf_counter() - self._started) * 1_000_000
+        if event.startswith("nursery."):
+            task = data
+            name = source._task_names.get(task)
+            record = {"name": name or _task_name(task), "cat": "nursery"}
+            if event == "nursery.task_start":
+                record["ph"] = "B"
+            else:
+                record["ph"] = "E"
+                record["args"] = {"outcome": event[len("nursery.task_") :]}
+        else:
+            try:
+                task = get_current_task()
+            except RuntimeError:
+                task = None
+            name = None
+            record = {"cat": event.split(".", 1)[0]}
+            if event in _BEGIN:
+                record.update(name=_BEGIN[event], ph="B")
+            elif event in _END:
+                record.update(name=_END[event], ph="E")
+            else:
+                record.update(name=event, ph="i", s="t")
+            record["args"] = {"channel": channel_name(source)}
+        record.update(ts=ts, pid=self._pid, tid=self._tid(task, name))
+        self.events.append(record)
+
+    def trace(self) -> Dict[str, Any]:
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
+
+
+def _task_name(task: asyncio.Task) -> str:
+    get_name = getattr(task, "get_name", None)  # Python 3.8+
+    return get_name() if get_name is not None else f"task-{id(task):#x}"
@@ -0,0 +1,127 @@
+import asyncio
+import math
+from asyncio import AbstractEventLoop
+from typing import Any, Awaitable, Callable, Optional
+
+from .csp import Channel, select
+from .nursery import Nursery, ActionOnFailure
+
+
+class WorkerPool:
+    """Consumes a channel with a pool of workers that follows its backlog
+
+    Every `interval` seconds the backlog of the source (buffered items plus
+    blocked senders) is compared with the number of workers. The pool grows
+    right away when there are more than `high_watermark` items per worker,
+    but it shrinks only one idle worker at a time, when the backlog stays at
+    or below `low_watermark` items per worker and `cooldown` seconds passed
+    since the last change, so it does not thrash.
+
+    A worker whose handler raises ends, as `on_failure` of the nursery
+    says: with the IGNORE_* actions it is replaced at the next check.
+
+    `run` returns when the source is closed and drained.
+    """
+
+    def __init__(
+        self,
+        source: Channel,
+        handler: Callable[[Any], Awaitable[Any]],
+        min_workers: int = 1,
+        max_workers: int = 8,
+        high_watermark: float = 2.0,
+        low_watermark: float = 0.0,
+        interval: float = 0.1,
+        cooldown: float = 1.0,
+        on_failure: ActionOnFailure = (
+            ActionOnFailure.CANCEL_ALL_CHILDREN_AND_RAISE
+        ),
+        loop: Optional[AbstractEventLoop] = None,
+    ) -> None:
+        if min_workers < 0 or max_workers < max(min_workers, 1):
+            raise ValueError(
+                "invalid worker bounds",
+                {"min_workers": min_workers, "max_workers": max_workers},
+            )
+        if low_watermark >= high_watermark:
+            raise ValueError("low_watermark must be less than high_watermark")
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.interval = interval
+        self.cooldown = cooldown
+        self.workers: int = 0
+        self._source = source
+        self._handler = handler
+        self._on_failure = on_failure
+        self._loop: AbstractEventLoop = loop or asyncio.get_event_loop()
+        self._retire: Channel = Channel()
+        self._nursery: Optional[Nursery] = None
+        self._last_scale: float = 0.0
+
+    def backlog(self) -> int:
+        return self._source.size() + self._source.waiting_senders()
+
+    async def run(self) -> None:
+        async with Nursery(self._on_failure, loop=self._loop) as n:
+            self._nursery = n
+            self._last_scale = self._loop.time()
+            for _ in range(self.min_workers):
+                self._add_worker()
+            while not self._is_finished():
+                await asyncio.sleep(self.interval)
+                self._rebalance()
+
+    def _is_finished(self) -> bool:
+        nursery = self._nursery
+        if nursery is not None and nursery.exception:
+            # with the IGNORE_* actions the other workers keep running and
+            # _rebalance replaces the failed one
+            if self._on_failure in (
+                ActionOnFailure.CANCEL_ALL_CHILDREN_WITHOUT_RAISE,
+                ActionOnFailure.CANCEL_ALL_CHILDREN_AND_RAISE,
+            ):
+                return True
+        return self._source.is_closed() and self._source.empty()
+
+    def _add_worker(self) -> None:
+        # only called while run() has the nursery open
+        assert self._nursery is not None
+        self.workers += 1
+        self._nursery.start_many((self._worker(),))
+
+    async def _worker(self) -> None:
+        try:
+            while True:
+                ch, item = await select(self._source.R(), self._retire.R())
+                if ch is self._retire or item is None:
+                    return
+                await self._handler(item)
+        finally:
+            self.workers -= 1
+
+    def _rebalance(self) -> None:
+        backlog = self.backlog()
+        now = self._loop.time()
+        # workers whose handler raised are gone
+        for _ in range(self.min_workers - self.workers):
+            self._add_worker()
+        if (
+            backlog > self.high_watermark * self.workers
+            and self.workers < self.max_workers
+        ):
+            target = max(
+                self.workers + 1, math.ceil(backlog / self.high_watermark)
+            )
+            for _ in range(min(target, self.max_workers) - self.workers):
+                self._add_worker()
+            self._last_scale = now
+        elif (
+            backlog <= self.low_watermark * self.workers
+            and self.workers > self.min_workers
+            and now - self._last_scale >= self.cooldown
+        ):
+            # only a worker that is waiting on the source can take it
+            if self._retire.send_nowait(True):
+                self._last_scale = now
@@ -0,0 +1,22 @@
+import asyncio
+
+import pytest
+
+from one_ring.testing import VirtualTimeEventLoop
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "virtual_time: run the test on a VirtualTimeEventLoop"
+    )
+
+
+@pytest.fixture
+def event_loop(request):
+    # modules opt in with `pytestmark = pytest.mark.virtual_time`
+    if request.node.get_closest_marker("virtual_time") is not None:
+        loop = VirtualTimeEventLoop()
+    else:
+        loop = asyncio.get_event_loop_policy().new_event_loop()
+    yield loop
+    loop.close()
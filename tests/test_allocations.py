@@ -0,0 +1,96 @@
+import sys
+
+import pytest
+
+from one_ring import Channel, Nursery, Timeout, select
+
+from utils import assert_allocations, measure_allocations
+
+# tracemalloc.reset_peak is new in Python 3.9
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 9), reason="needs tracemalloc.reset_peak"
+)
+
+# Budgets are peak bytes per operation, around twice what CPython 3.11
+# allocates; an operation must not keep memory allocated either.
+
+
+async def _nop():
+    pass
+
+
+@pytest.mark.asyncio
+async def test_send_nowait_receive_nowait(event_loop):
+    ch = Channel(maxsize=1)
+
+    def op():
+        ch.send_nowait(1)
+        ch.receive_nowait()
+
+    assert_allocations(await measure_allocations(op), peak_bytes=1024)
+
+
+@pytest.mark.asyncio
+async def test_buffered_receive(event_loop):
+    ch = Channel(maxsize=1)
+
+    async def op():
+        ch.send_nowait(1)
+        await ch.receive()
+
+    assert_allocations(await measure_allocations(op), peak_bytes=2048)
+
+
+@pytest.mark.asyncio
+async def test_buffered_receive_does_not_depend_on_buffered_items(
+    event_loop,
+):
+    ch = Channel(maxsize=1000)
+    for i in range(999):
+        ch.send_nowait(i)
+
+    async def op():
+        ch.send_nowait(1)
+        await ch.receive()
+
+    assert_allocations(await measure_allocations(op), peak_bytes=2048)
+
+
+@pytest.mark.asyncio
+async def test_select_two_cases(event_loop):
+    a, b = Channel(maxsize=1), Channel(maxsize=1)
+    actions = [a.R(), b.R()]
+
+    async def op():
+        b.send_nowait(1)
+        await select(*actions)
+
+    assert_allocations(await measure_allocations(op), peak_bytes=3072)
+
+
+@pytest.mark.asyncio
+async def test_select_actions(event_loop):
+    ch = Channel(maxsize=1)
+
+    def op():
+        ch.R()
+        ch.S(1)
+
+    assert_allocations(await measure_allocations(op), peak_bytes=1024)
+
+
+@pytest.mark.asyncio
+async def test_timeout(event_loop):
+    async def op():
+        await Timeout(0).receive()
+
+    assert_allocations(await measure_allocations(op), peak_bytes=8192)
+
+
+@pytest.mark.asyncio
+async def test_nursery_start(event_loop):
+    async def op():
+        async with Nursery() as nursery:
+            nursery.start(_nop())
+
+    assert_allocations(await measure_allocations(op), peak_bytes=12288)
@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from one_ring import (
+    Nursery,
+    NurseryChildFailure,
+    ActionOnFailure,
+    move_on_after,
+    move_on_at,
+)
+from one_ring.cancel_scope import _get_deadline_queue
+
+pytestmark = pytest.mark.virtual_time
+
+
+async def sleeper(c, delay=1):
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        c(True)
+        raise
+    else:
+        c(False)
+
+
+@pytest.mark.asyncio
+async def test_move_on_after_cancels_body(event_loop):
+    with move_on_after(0.05) as scope:
+        await asyncio.sleep(1)
+        assert False, "body must be cancelled"
+    assert scope.cancel_called
+    assert scope.cancelled_caught
+
+
+@pytest.mark.asyncio
+async def test_move_on_after_not_expired(event_loop):
+    with move_on_after(1) as scope:
+        await asyncio.sleep(0.01)
+    assert not scope.cancel_called
+    assert not scope.cancelled_caught
+
+
+@pytest.mark.asyncio
+async def test_move_on_at_without_deadline(event_loop):
+    with move_on_at(None) as scope:
+        await asyncio.sleep(0.01)
+    assert not scope.cancel_called
+
+
+@pytest.mark.asyncio
+async def test_nested_scopes(event_loop):
+    with move_on_after(0.05) as outer:
+        with move_on_after(1) as inner:
+            await asyncio.sleep(1)
+    assert outer.cancelled_caught
+    assert not inner.cancel_called
+    assert not inner.cancelled_caught
+
+
+@pytest.mark.asyncio
+async def test_scopes_share_one_timer(event_loop):
+    scopes = [move_on_after(1 + i / 1000) for i in range(100)]
+    for s in scopes:
+        s.__enter__()
+    queue = _get_deadline_queue(event_loop)
+    assert queue._handle is not None
+    assert queue._handle_when == scopes[0].deadline
+    for s in reversed(scopes):
+        s.__exit__(None, None, None)
+    assert not any(s.cancel_called for s in scopes)
+
+
+@pytest.mark.asyncio
+async def test_nursery_deadline_cancels_body_and_children(event_loop):
+    cancelled = MagicMock(return_value=1)
+    async with Nursery(deadline=event_loop.time() + 0.05) as n:
+        n.start(sleeper(cancelled))
+        await asyncio.sleep(1)
+        assert False, "body must be cancelled"
+
+    cancelled.assert_called_with(True)
+    assert n.cancel_scope.cancelled_caught
+    assert not n.exception
+
+
+@pytest.mark.asyncio
+async def test_nursery_deadline_after_body(event_loop):
+    cancelled = MagicMock(return_value=1)
+    async with Nursery(
+        ActionOnFailure.CANCEL_ALL_CHILDREN_AND_RAISE,
+        deadline=event_loop.time() + 0.05,
+    ) as n:
+        n.start(sleeper(cancelled))
+
+    cancelled.assert_called_with(True)
+    assert n.cancel_scope.cancel_called
+    assert not n.cancel_scope.cancelled_caught
+
+
+@pytest.mark.asyncio
+async def test_nursery_deadline_not_reached(event_loop):
+    cancelled = MagicMock(return_value=1)
+    async with Nursery(deadline=event_loop.time() + 1) as n:
+        n.start(sleeper(cancelled, 0.01))
+
+    cancelled.assert_called_with(False)
+    assert not n.cancel_scope.cancel_called
+
+
+@pytest.mark.asyncio
+async def test_nursery_deadline_child_failure_still_raises(event_loop):
+    async def err():
+        raise Exception("booo!")
+
+    with pytest.raises(NurseryChildFailure):
+        async with Nursery(
+            ActionOnFailure.IGNORE_AND_RAISE,
+            deadline=event_loop.time() + 0.05,
+        ) as n:
+            n.start(err())
+            await asyncio.sleep(1)
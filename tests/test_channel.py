@@ -3,7 +3,7 @@ import collections
 from unittest.mock import Mock
 import pytest
 
-from one_ring import Channel
+from one_ring import Channel, PriorityChannel, select
 
 
 def run_concurrent(corotine, loop):
@@ -298,3 +298,99 @@ async def test_sending_none_to_channel(event_loop):
     with pytest.raises(ValueError) as excinfo:
         await buffered_channel.send(None)
     assert "you can not send None to a channel" in str(excinfo)
+
+
+def test_channel_max_bytes_values():
+    Channel(max_bytes=1)  # OK
+    with pytest.raises(ValueError):
+        Channel(max_bytes=0)
+
+
+@pytest.mark.asyncio
+async def test_channel_max_bytes(event_loop):
+    ch = Channel(max_bytes=10)
+    assert ch.send_nowait(b"x" * 4)
+    assert ch.send_nowait(b"x" * 4)
+    assert ch.byte_size() == 8
+    assert not ch.full()
+    # the last item may overshoot the budget
+    assert ch.send_nowait(b"x" * 50)
+    assert ch.full()
+    assert not ch.send_nowait(b"x")
+    assert ch.size() == 3
+
+    sender = event_loop.create_task(ch.send(b"y"))
+    await asyncio.sleep(0)
+    assert not sender.done()
+    assert ch.receive_nowait() == b"x" * 4
+    await asyncio.sleep(0)
+    assert not sender.done()
+    assert await ch.receive() == b"x" * 4
+    assert len(await ch.receive()) == 50
+    assert await sender
+    assert ch.byte_size() == 1
+
+
+@pytest.mark.asyncio
+async def test_channel_max_bytes_wakes_up_many_senders(event_loop):
+    ch = Channel(max_bytes=100, sizer=lambda item: item["size"])
+    ch.send_nowait({"size": 100})
+    senders = [event_loop.create_task(ch.send({"size": 10})) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert ch.receive_nowait() == {"size": 100}
+    assert all(await asyncio.gather(*senders))
+    assert ch.byte_size() == 50
+    assert ch.max_bytes == 100
+
+
+@pytest.mark.parametrize("channel_class", [Channel, PriorityChannel])
+def test_channel_max_bytes_of_item_changed_after_send(channel_class):
+    ch = channel_class(max_bytes=10)
+    item = bytearray(b"abcd")
+    assert ch.send_nowait(item)
+    item.extend(b"efgh")
+    assert ch.receive_nowait() is item
+    assert ch.byte_size() == 0
+    assert ch.send_nowait(b"x" * 10)
+    assert ch.full()
+
+
+@pytest.mark.asyncio
+async def test_priority_channel(event_loop):
+    ch = PriorityChannel(maxsize=10, priority=lambda item: item[0])
+    for item in [(2, "a"), (1, "b"), (2, "c"), (0, "d"), (1, "e")]:
+        assert ch.send_nowait(item)
+    assert ch.size() == 5
+    received = [ch.receive_nowait()[1] for _ in range(3)]
+    assert received == ["d", "b", "e"]
+    assert await ch.receive() == (2, "a")
+    ch.close()
+    assert await ch.receive() == (2, "c")
+    assert await ch.receive() is None
+
+
+def test_priority_channel_arguments_and_str(event_loop):
+    # same positional arguments as Channel
+    ch = PriorityChannel(10, event_loop, 100)
+    assert ch._loop is event_loop
+    ch.send_nowait(b"bb")
+    ch.send_nowait(b"a")
+    assert str(ch) == (
+        "<PriorityChannel maxsize=10 max_bytes=100 bytes=3 "
+        "_data=[b'a', b'bb']>"
+    )
+
+
+@pytest.mark.asyncio
+async def test_priority_channel_blocks_when_full(event_loop):
+    ch = PriorityChannel(maxsize=2)
+    ch.send_nowait(5)
+    ch.send_nowait(3)
+    assert ch.full()
+    sender = event_loop.create_task(ch.send(1))
+    await asyncio.sleep(0)
+    assert not sender.done()
+    assert await select(ch.R()) == (ch, 3)
+    assert await sender
+    assert ch.receive_nowait() == 1
+    assert ch.receive_nowait() == 5
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from one_ring import CoDelChannel, CoDelMode, select
+
+
+def test_codel_channel_parameters():
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            CoDelChannel(target=0, loop=loop)
+    finally:
+        loop.close()
+
+
+@pytest.mark.asyncio
+async def test_fresh_items_are_not_dropped(event_loop):
+    ch = CoDelChannel(maxsize=10, target=0.01, interval=0.01)
+    for i in range(1, 11):
+        ch.send_nowait(i)
+    assert [ch.receive_nowait() for _ in range(10)] == list(range(1, 11))
+    assert ch.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_standing_queue_is_dropped(event_loop):
+    dropped = []
+    ch = CoDelChannel(
+        maxsize=100, target=0.001, interval=0.01, on_drop=dropped.append
+    )
+    for i in range(1, 51):
+        ch.send_nowait(i)
+    await asyncio.sleep(0.005)
+    # the delay is above target, the interval starts now
+    assert ch.receive_nowait() == 1
+    assert not ch.overloaded()
+    await asyncio.sleep(0.015)
+    item = ch.receive_nowait()
+    assert ch.overloaded()
+    assert dropped == [2] and item == 3
+    await asyncio.sleep(0.03)
+    received = ch.receive_nowait()
+    assert ch.dropped == len(dropped) > 1
+    # the head is dropped, 3 was received in between
+    assert dropped[1:] == list(range(4, 4 + len(dropped) - 1))
+    assert received == dropped[-1] + 1
+
+
+@pytest.mark.asyncio
+async def test_reject_mode(event_loop):
+    ch = CoDelChannel(
+        maxsize=100, target=0.001, interval=0.01, mode=CoDelMode.REJECT
+    )
+    for i in range(1, 11):
+        ch.send_nowait(i)
+    await asyncio.sleep(0.005)
+    ch.receive_nowait()
+    await asyncio.sleep(0.015)
+    assert ch.receive_nowait() == 2
+    assert ch.overloaded()
+    assert not ch.send_nowait(11)
+    assert not await ch.send(11)
+    assert await asyncio.wait_for(select(ch.S(11)), 1) == (ch, None)
+    assert ch.rejected == 3 and ch.dropped == 0
+
+    # once the queue is drained the channel takes items again
+    while ch.size() > 1:
+        ch.receive_nowait()
+    ch.receive_nowait()
+    assert not ch.overloaded()
+    assert await ch.send(12)
+
+
+@pytest.mark.asyncio
+async def test_blocked_select_send_is_rejected(event_loop):
+    ch = CoDelChannel(
+        maxsize=3, target=0.001, interval=0.01, mode=CoDelMode.REJECT
+    )
+    for i in range(1, 4):
+        ch.send_nowait(i)
+    sender = event_loop.create_task(ch.send(4))
+    selector = event_loop.create_task(select(ch.S(5)))
+    await asyncio.sleep(0.005)
+    assert ch.receive_nowait() == 1
+    await asyncio.sleep(0)
+    assert sender.done()
+    # the select sender gets room as the channel becomes overloaded
+    await asyncio.sleep(0.015)
+    assert ch.receive_nowait() == 2
+    assert ch.overloaded()
+    await asyncio.sleep(0.01)
+    assert selector.done()
+    assert selector.result() == (ch, None)
+    assert ch.rejected == 1
+    assert [ch.receive_nowait() for _ in range(3)] == [3, 4, None]
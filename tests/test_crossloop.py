@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from one_ring import CrossLoopChannel
+
+
+class LoopThread:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def test_cross_loop_channel_maxsize():
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            CrossLoopChannel(0, loop, loop)
+    finally:
+        loop.close()
+
+
+@pytest.mark.asyncio
+async def test_items_cross_loops_in_order(event_loop):
+    other = LoopThread()
+    try:
+        for maxsize in (1, 16):
+            ch = CrossLoopChannel(maxsize, other.loop, event_loop)
+
+            async def producer():
+                for i in range(1, 1001):
+                    assert await ch.send(i)
+                ch.close()
+
+            f = other.run(producer())
+            received = []
+            while True:
+                item = await ch.receive()
+                if item is None:
+                    break
+                received.append(item)
+            await asyncio.wrap_future(f)
+            assert received == list(range(1, 1001))
+    finally:
+        other.stop()
+
+
+@pytest.mark.asyncio
+async def test_receiver_loop_to_other_loop(event_loop):
+    other = LoopThread()
+    try:
+        ch = CrossLoopChannel(4, event_loop, other.loop)
+
+        async def consumer():
+            return [await ch.receive() for _ in range(100)]
+
+        f = other.run(consumer())
+        for i in range(100):
+            await ch.send(i + 1)
+        assert await asyncio.wrap_future(f) == list(range(1, 101))
+    finally:
+        other.stop()
+
+
+@pytest.mark.asyncio
+async def test_wakeups_are_coalesced(event_loop):
+    ch = CrossLoopChannel(100, event_loop, event_loop)
+    wakeup = Mock(wraps=event_loop.call_soon_threadsafe)
+    event_loop.call_soon_threadsafe = wakeup
+    try:
+        receiver = event_loop.create_task(ch.receive())
+        await asyncio.sleep(0)
+        for i in range(1, 51):
+            assert ch.send_nowait(i)
+        assert wakeup.call_count == 1
+        assert await receiver == 1
+        assert ch.size() == 49
+    finally:
+        del event_loop.call_soon_threadsafe
+
+
+@pytest.mark.asyncio
+async def test_close_wakes_both_ends(event_loop):
+    ch = CrossLoopChannel(1, event_loop, event_loop)
+    assert ch.send_nowait(1)
+    sender = event_loop.create_task(ch.send(2))
+    await asyncio.sleep(0)
+    ch.close()
+    assert await sender is False
+    assert await ch.receive() == 1
+    assert await ch.receive() is None
+    with pytest.raises(ValueError):
+        ch.send_nowait(None)
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+
+import pytest
+
+from one_ring import DurableChannel, Delivery, FsyncPolicy, enable_metrics
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy", [FsyncPolicy.EVERY_ITEM, FsyncPolicy.GROUP_COMMIT]
+)
+async def test_unacked_items_survive_reopen(event_loop, tmp_path, policy):
+    path = str(tmp_path / "wal")
+    ch = DurableChannel(path, maxsize=10, fsync_policy=policy)
+    for i in range(1, 6):
+        assert await ch.send(i)
+    first = await ch.receive()
+    second = await ch.receive()
+    assert first == Delivery(1, 1)
+    ch.ack(first)
+    await ch.aclose()
+
+    # the second one was received but not acked
+    ch = DurableChannel(path, maxsize=10, fsync_policy=policy)
+    assert [ch.receive_nowait().item for _ in range(4)] == [2, 3, 4, 5]
+    assert second.id == 2
+    assert await ch.send(6)
+    assert ch.receive_nowait() == Delivery(6, 6)
+    await ch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_group_commit_batches_concurrent_sends(event_loop, tmp_path):
+    ch = DurableChannel(str(tmp_path / "wal"), maxsize=100)
+    syncs = []
+    write_and_sync = ch._write_and_sync
+
+    def counting_write_and_sync(data):
+        syncs.append(len(data))
+        write_and_sync(data)
+
+    ch._write_and_sync = counting_write_and_sync
+    await asyncio.gather(*(ch.send(i) for i in range(1, 51)))
+    assert ch.size() == 50
+    assert len(syncs) < 50
+    await ch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_torn_tail_is_truncated(event_loop, tmp_path):
+    path = tmp_path / "wal"
+    ch = DurableChannel(str(path), maxsize=10)
+    await ch.send("a")
+    await ch.send("b")
+    await ch.aclose()
+    content = path.read_bytes()
+    path.write_bytes(content[:-3])
+
+    ch = DurableChannel(str(path), maxsize=10)
+    assert ch.size() == 1
+    assert ch.receive_nowait() == Delivery(1, "a")
+    await ch.send("c")
+    assert ch.receive_nowait() == Delivery(2, "c")
+    await ch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_redelivery_after_visibility_timeout(event_loop, tmp_path):
+    ch = DurableChannel(
+        str(tmp_path / "wal"), maxsize=10, visibility_timeout=0.05
+    )
+    await ch.send("x")
+    await ch.send("y")
+    delivery = await ch.receive()
+    assert ch.in_flight() == 1
+    await asyncio.sleep(0.1)
+    assert ch.in_flight() == 0
+    assert await ch.receive() == delivery
+    ch.ack(delivery)
+    # a late ack of a delivery that waits to be delivered again
+    assert (await ch.receive()).item == "y"
+    await asyncio.sleep(0.1)
+    assert ch.size() == 1
+    ch.ack(2)
+    assert ch.empty()
+    await ch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sojourn_with_redelivery(event_loop, tmp_path):
+    ch = DurableChannel(
+        str(tmp_path / "wal"), maxsize=10, visibility_timeout=0.05
+    )
+    enable_metrics(ch, latency=True)
+    await ch.send("x")
+    await ch.send("y")
+    await ch.send("z")
+    delivery = await ch.receive()
+    await ch.receive()
+    await asyncio.sleep(0.1)
+    # both are queued again, one is acked before it is delivered again
+    ch.ack(2)
+    assert await ch.receive() == delivery
+    assert (await ch.receive()).item == "z"
+    assert ch.in_flight() == 2
+    sojourn = ch._metrics.sojourn
+    assert sojourn.count == 4
+    # a redelivery counts from the first send of the item
+    assert sojourn.max >= 0.1
+    await ch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_log_is_compacted_when_everything_is_acked(event_loop, tmp_path):
+    path = tmp_path / "wal"
+    ch = DurableChannel(str(path), maxsize=10, compact_bytes=1)
+    for i in range(1, 4):
+        await ch.send(i)
+    for _ in range(3):
+        ch.ack(await ch.receive())
+    await ch.aclose()
+    assert path.stat().st_size == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", list(FsyncPolicy))
+async def test_log_is_synced_off_the_loop(
+    event_loop, tmp_path, monkeypatch, policy
+):
+    ch = DurableChannel(str(tmp_path / "wal"), maxsize=10, fsync_policy=policy)
+    threads = set()
+    write_and_sync = ch._write_and_sync
+
+    def record_thread(data):
+        threads.add(threading.get_ident())
+        write_and_sync(data)
+
+    monkeypatch.setattr(ch, "_write_and_sync", record_thread)
+    assert ch.send_nowait("a")
+    await ch.send("b")
+    ch.ack(await ch.receive())
+    await ch.aclose()
+    assert threads
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_log_keeps_only_live_records_under_load(event_loop, tmp_path):
+    path = tmp_path / "wal"
+    ch = DurableChannel(str(path), maxsize=10, compact_bytes=4096)
+    await ch.send("never acked")
+    unacked = await ch.receive()
+    for i in range(2000):
+        await ch.send(i)
+        ch.ack(await ch.receive())
+    await ch.send("queued")
+    await ch.aclose()
+    assert path.stat().st_size < 2 * 4096
+    ch = DurableChannel(str(path), maxsize=10)
+    assert [ch.receive_nowait() for _ in range(2)] == [
+        unacked,
+        Delivery(2002, "queued"),
+    ]
+    await ch.aclose()
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from one_ring import LogChannel, select
+
+
+@pytest.mark.asyncio
+async def test_readers_keep_their_own_offsets(event_loop):
+    log = LogChannel(segment_size=64)
+    early = log.reader(0)
+    for i in range(20):
+        assert log.append(b"item-%d" % i) == i
+    late = log.reader()
+    assert len(log._segments) > 1
+    assert early.lag() == 20 and late.lag() == 0
+
+    first = early.receive_nowait()
+    assert isinstance(first, memoryview)
+    assert bytes(first) == b"item-0"
+    assert [bytes(early.receive_nowait()) for _ in range(19)] == [
+        b"item-%d" % i for i in range(1, 20)
+    ]
+    assert early.receive_nowait() is None
+    # reading does not remove anything
+    assert bytes(log.reader(5).receive_nowait()) == b"item-5"
+    assert log.size() == 20
+    log.release()
+
+
+@pytest.mark.asyncio
+async def test_waiting_readers_are_woken_up(event_loop):
+    log = LogChannel()
+    readers = [log.reader() for _ in range(3)]
+    tasks = [event_loop.create_task(r.receive()) for r in readers]
+    await asyncio.sleep(0)
+    log.append(b"hello")
+    assert [bytes(item) for item in await asyncio.gather(*tasks)] == [
+        b"hello"
+    ] * 3
+    log.close()
+    assert await readers[0].receive() is None
+    log.release()
+
+
+@pytest.mark.asyncio
+async def test_select_on_reader(event_loop):
+    log = LogChannel()
+    reader = log.reader()
+    selecting = event_loop.create_task(select(reader.R()))
+    await asyncio.sleep(0)
+    assert await select(log.S(b"x")) == (log, b"x")
+    ch, item = await selecting
+    assert ch is reader and bytes(item) == b"x"
+    assert reader.offset == 1
+    log.release()
+
+
+@pytest.mark.asyncio
+async def test_retention_by_size(event_loop):
+    log = LogChannel(segment_size=64, retention_bytes=128)
+    reader = log.reader()
+    log.append(b"00")
+    kept = reader.receive_nowait()
+    for i in range(1, 100):
+        log.append(b"%02d" % i)
+    assert log.first_offset > 0
+    assert log.byte_size() <= 128 + 64
+    assert bytes(kept) == b"00"
+    item = reader.receive_nowait()
+    assert reader.lost == log.first_offset - 1
+    assert bytes(item) == b"%02d" % log.first_offset
+    log.release()
+
+
+@pytest.mark.asyncio
+async def test_retention_by_age(event_loop):
+    log = LogChannel(segment_size=64, retention_seconds=0.01)
+    for i in range(10):
+        log.append(b"%02d" % i)
+    await asyncio.sleep(0.02)
+    log.append(b"x" * 60)
+    assert len(log._segments) == 1
+    assert log.first_offset == 10
+    log.release()
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from one_ring import LoopLagMonitor, Nursery
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+async def blocker():
+    await asyncio.sleep(0.03)
+    block_the_loop(0.2)
+
+
+@pytest.mark.asyncio
+async def test_lag_is_recorded(event_loop):
+    with LoopLagMonitor(interval=0.01, threshold=0.05) as monitor:
+        await asyncio.sleep(0.1)
+    assert monitor.lag.count >= 5
+    assert monitor.lag.p50() < 0.05
+    assert not monitor.stalls
+    assert monitor._watchdog is None
+
+
+@pytest.mark.asyncio
+async def test_stall_names_the_blocking_child(event_loop):
+    stalls = []
+    with LoopLagMonitor(
+        interval=0.01, threshold=0.05, on_stall=stalls.append
+    ) as monitor:
+        async with Nursery() as n:
+            n.start(asyncio.sleep(0.1), name="sleeper")
+            n.start(blocker(), name="blocker")
+        await asyncio.sleep(0.02)
+    assert len(stalls) == 1
+    stall = stalls[0]
+    assert list(monitor.stalls) == stalls
+    assert stall.lag >= 0.15
+    assert stall.child_name == "blocker"
+    assert stall.task is n.get_task_by_name("blocker")
+    assert any("block_the_loop" in line for line in stall.stack)
+    assert monitor.lag.max >= 0.15
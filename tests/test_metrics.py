@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from one_ring import (
+    Channel,
+    CoDelChannel,
+    DurableChannel,
+    LatencyHistogram,
+    PriorityChannel,
+    SpillChannel,
+    enable_metrics,
+    metrics,
+)
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_disabled_by_default(event_loop):
+    ch = Channel(maxsize=1)
+    ch.send_nowait(1)
+    assert ch._metrics is None
+    assert ch not in metrics.registry._channels
+
+
+@pytest.mark.asyncio
+async def test_channel_counters(event_loop):
+    ch = Channel(maxsize=2, name="counters", metrics=True)
+    assert ch.send_nowait(1)
+    assert ch.send_nowait(2)
+    assert not ch.send_nowait(3)
+    sender = event_loop.create_task(ch.send(3))
+    await asyncio.sleep(0.01)
+    assert ch.receive_nowait() == 1
+    assert await sender
+    assert await ch.receive() == 2
+    assert ch.receive_nowait() == 3
+    assert ch.receive_nowait() is None
+    receiver = event_loop.create_task(ch.receive())
+    await asyncio.sleep(0.01)
+    ch.send_nowait(4)
+    assert await receiver == 4
+
+    m = ch._metrics
+    assert (m.sends, m.receives) == (4, 4)
+    assert (m.send_failures, m.receive_failures) == (1, 1)
+    assert m.peak_size == 2
+    assert m.send_blocked_time >= 0.01
+    assert m.receive_blocked_time >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_registry_snapshot_and_prometheus_text(event_loop):
+    ch = Channel(maxsize=4, name="snap", metrics=True)
+    spill = SpillChannel()
+    enable_metrics(spill, name='spill "a"')
+    ch.send_nowait("x")
+    spill.send_nowait("y")
+
+    rows = {row["name"]: row for row in metrics.registry.snapshot()}
+    assert rows["snap"]["sends"] == 1 and rows["snap"]["size"] == 1
+    assert rows['spill "a"']["type"] == "SpillChannel"
+
+    text = metrics.registry.prometheus_text()
+    assert "# TYPE one_ring_channel_sends_total counter" in text
+    assert 'one_ring_channel_sends_total{channel="snap",type="Channel"} 1' in (
+        text
+    )
+    assert 'channel="spill \\"a\\""' in text
+
+    del ch
+    assert "snap" not in {row["name"] for row in metrics.registry.snapshot()}
+
+
+def test_latency_histogram():
+    h = LatencyHistogram()
+    for ms in range(1, 1001):
+        h.record(ms / 1000)
+    assert h.count == 1000
+    assert h.p50() == pytest.approx(0.5, rel=1 / 32)
+    assert h.p99() == pytest.approx(0.99, rel=1 / 32)
+    assert h.p999() == pytest.approx(0.999, rel=1 / 32)
+    assert h.quantile(1) == h.max == 1.0
+    # small values are exact
+    h.reset()
+    h.record(0.000_017)
+    assert h.p50() == 0.000_017
+    assert len(LatencyHistogram()._counts) == 0
+
+
+@pytest.mark.asyncio
+async def test_sojourn_time_of_items(event_loop):
+    ch = Channel(maxsize=10, name="sojourn", latency=True)
+    items = [{"n": i} for i in range(5)]
+    for item in items:
+        ch.send_nowait(item)
+    await asyncio.sleep(0.02)
+    received = [ch.receive_nowait() for _ in range(5)]
+    # items are not wrapped
+    assert all(a is b for a, b in zip(received, items))
+    sojourn = ch._metrics.sojourn
+    assert sojourn.count == 5
+    assert sojourn.p50() >= 0.02
+
+    receiver = event_loop.create_task(ch.receive())
+    await asyncio.sleep(0)
+    ch.send_nowait({"n": 5})
+    assert await receiver == {"n": 5}
+    assert sojourn.count == 6
+    assert "one_ring_channel_sojourn_seconds_count" in (
+        metrics.registry.prometheus_text()
+    )
+
+
+@pytest.mark.asyncio
+async def test_sojourn_time_of_priority_channel(event_loop):
+    ch = PriorityChannel(maxsize=10)
+    enable_metrics(ch, latency=True)
+    ch.send_nowait(5)
+    await asyncio.sleep(0.02)
+    ch.send_nowait(1)
+    assert ch.receive_nowait() == 1
+    assert ch._metrics.sojourn.max < 0.02
+    assert ch.receive_nowait() == 5
+    assert ch._metrics.sojourn.max >= 0.02
+    row = ch._metrics.as_dict()
+    assert row["sojourn_p999"] == row["sojourn_p99"] >= 0.02
+
+
+@pytest.mark.parametrize("channel_class", [Channel, PriorityChannel])
+@pytest.mark.asyncio
+async def test_sojourn_of_items_sent_before_enable(event_loop, channel_class):
+    ch = channel_class(maxsize=10)
+    ch.send_nowait(2)
+    ch.send_nowait(1)
+    await asyncio.sleep(0.02)
+    enable_metrics(ch, latency=True)
+    ch.receive_nowait()
+    ch.receive_nowait()
+    # they count from enable_metrics on
+    assert ch._metrics.sojourn.count == 2
+    assert ch._metrics.sojourn.max < 0.02
+
+
+@pytest.mark.asyncio
+async def test_enable_metrics_while_a_sender_is_blocked(event_loop):
+    ch = Channel(maxsize=1)
+    ch.send_nowait(1)
+    sender = event_loop.create_task(ch.send(2))
+    await asyncio.sleep(0)
+    enable_metrics(ch)
+    assert ch.receive_nowait() == 1
+    assert await sender
+    assert ch._metrics.send_blocked_time == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_keywords_of_channel_subclasses(event_loop, tmp_path):
+    channels = [
+        PriorityChannel(maxsize=2, name="priority", latency=True),
+        CoDelChannel(maxsize=2, name="codel", metrics=True),
+        SpillChannel(memory_items=2, name="spill", latency=True),
+        DurableChannel(str(tmp_path / "wal"), maxsize=2, name="durable"),
+    ]
+    for ch in channels[:3]:
+        assert ch._metrics is not None
+        ch.send_nowait(1)
+        assert ch.receive_nowait() == 1
+        assert ch._metrics.receives == 1
+    assert channels[3].name == "durable"
+    assert channels[3]._metrics is None
+    await channels[3].aclose()
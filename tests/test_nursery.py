@@ -4,9 +4,17 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from one_ring import Nursery, NurseryChildFailure, ActionOnFailure
+from one_ring import (
+    Channel,
+    CpuAccounting,
+    Nursery,
+    NurseryChildFailure,
+    ActionOnFailure,
+)
 from one_ring.nursery import NURSERY_MAIN_TASK_NAME
 
+pytestmark = pytest.mark.virtual_time
+
 
 async def nop(count=1):
     for _ in range(count):
@@ -370,3 +378,161 @@ async def test_exception_in_body_IGNORE_WITHOUT_RAISE(event_loop):
         assert False, "it must raise exception"
 
     cancelled.assert_called_with(True)
+
+
+@pytest.mark.asyncio
+async def test_start_many_anonymous_tasks(event_loop):
+    async with Nursery() as n:
+        tasks = n.start_many(nop() for _ in range(10))
+        assert len(tasks) == 10
+        assert len(n.tasks) == 1
+
+    assert all(t.done() for t in tasks)
+    assert not n._anonymous_tasks
+
+
+@pytest.mark.asyncio
+async def test_start_many_child_failure(event_loop):
+    async def job(c):
+        try:
+            await nop(1)
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            c(True)
+
+    cancelled = MagicMock(return_value=1)
+    try:
+        async with Nursery(ActionOnFailure.CANCEL_ALL_CHILDREN_AND_RAISE) as n:
+            n.start_many([job(cancelled), nop_err(1)])
+    except NurseryChildFailure as e:
+        assert "booo!" in str(e.__cause__)
+    else:
+        assert False, "it must raise exception"
+
+    cancelled.assert_called_with(True)
+
+
+@pytest.mark.asyncio
+async def test_empty_nursery(event_loop):
+    async with Nursery() as n:
+        pass
+    assert len(n.tasks) == 1
+
+
+@pytest.mark.asyncio
+async def test_results_channel_streams_children_outcomes(event_loop):
+    async def job(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    results = Channel(maxsize=1)
+    received = []
+    async with Nursery(results=results) as n:
+        n.start(job(1, 0.03), "a")
+        n.start(job(2, 0.01), "b")
+        n.start_many([nop_err(1)])
+        for _ in range(3):
+            received.append(await results.receive())
+
+    assert [r.name for r in received] == ["b", "a", None]
+    assert [r.result for r in received[:2]] == [2, 1]
+    assert received[0].exception is None
+    assert "booo!" in str(received[2].exception)
+    assert results.is_closed()
+
+
+@pytest.mark.asyncio
+async def test_results_channel_consumed_outside_nursery(event_loop):
+    async def job(value):
+        return value
+
+    results = Channel()
+
+    async def run():
+        async with Nursery(results=results) as n:
+            n.start_many(job(i) for i in range(1, 6))
+
+    task = event_loop.create_task(run())
+    received = []
+    while True:
+        r = await results.receive()
+        if r is None:
+            break
+        received.append(r.result)
+    await task
+    assert sorted(received) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_nursery_metrics(event_loop):
+    async def sleep_and_return(delay):
+        await asyncio.sleep(delay)
+
+    n = Nursery(metrics=True)
+    assert Nursery().metrics is None
+    async with n:
+        n.start_many(sleep_and_return(0.01) for _ in range(5))
+        n.start(sleep_and_return(0.02), name="slow")
+        assert n.metrics.running == 6
+        await asyncio.sleep(0.015)
+        assert n.metrics.running == 1
+        assert n.metrics.finished == 5
+    m = n.metrics
+    assert (m.started, m.running, m.max_running) == (6, 0, 6)
+    assert m.durations.count == 6
+    assert m.durations.max >= 0.02
+    assert m.as_dict()["duration_p50"] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_nursery_metrics_outcomes(event_loop):
+    n = Nursery(
+        ActionOnFailure.CANCEL_ALL_CHILDREN_WITHOUT_RAISE, metrics=True
+    )
+    async with n:
+        n.start(nop_err())
+        n.start_many(nop(10) for _ in range(3))
+    assert n.metrics.failed == 1
+    assert n.metrics.cancelled == 3
+    assert n.metrics.outcomes == {
+        "failure_cancelled_children": 1,
+        "cancelled_by_nursery": 3,
+    }
+
+    n = Nursery(ActionOnFailure.IGNORE_WITHOUT_RAISE, metrics=True)
+    async with n:
+        n.start(nop_err())
+        n.start(nop())
+        n.start(nop(10), name="cancelled").cancel()
+    assert n.metrics.outcomes == {"failure_ignored": 1, "cancelled": 1}
+    assert n.metrics.finished == 1
+
+
+@pytest.mark.asyncio
+async def test_nursery_cpu_accounting(event_loop):
+    async def busy(steps):
+        for _ in range(steps):
+            sum(range(20_000))
+            await asyncio.sleep(0)
+        return steps
+
+    async def idle():
+        await asyncio.sleep(0.01)
+
+    accounting = CpuAccounting()
+    async with Nursery(cpu_accounting=accounting) as n:
+        hot = n.start(busy(20), name="hot")
+        n.start(idle(), name="idle")
+        n.start_many(busy(2) for _ in range(3))
+    assert hot.result() == 20
+
+    top = accounting.top(2)
+    assert [u.name for u in top] == [
+        "hot",
+        "<anonymous test_nursery_cpu_accounting.<locals>.busy>",
+    ]
+    assert top[0].steps == 21
+    assert top[1].steps == 9
+    assert accounting.steps["idle"] == 2
+    assert accounting.cpu_time["idle"] < top[0].cpu_time
+    assert "hot" in accounting.report(1)
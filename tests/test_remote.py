@@ -0,0 +1,174 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from one_ring import Channel, RemoteChannel, serve
+from one_ring.remote import MsgpackCodec, PickleCodec, RawBytesCodec
+
+
+async def shutdown(remote, server):
+    remote.close()
+    server.close()
+    await server.wait_closed()
+    # let the server side of the connection see the end of the stream
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_send_over_unix_socket(event_loop, tmp_path):
+    channel = Channel(maxsize=4)
+    address = str(tmp_path / "ch.sock")
+    server = await serve(channel, address)
+    remote = await RemoteChannel.connect(address)
+    try:
+        for i in range(1, 51):
+            assert await remote.send({"n": i})
+            assert (await channel.receive())["n"] == i
+    finally:
+        await shutdown(remote, server)
+
+
+@pytest.mark.asyncio
+async def test_credits_follow_remote_buffer(event_loop, tmp_path):
+    channel = Channel(maxsize=2)
+    # both ends are this test, trusted peers
+    server = await serve(
+        channel, ("127.0.0.1", 0), codec=PickleCodec(), window=1
+    )
+    port = server.sockets[0].getsockname()[1]
+    remote = await RemoteChannel.connect(
+        ("127.0.0.1", port), codec=PickleCodec()
+    )
+    try:
+        # two items fill the remote channel, one more waits in the window
+        for i in range(1, 4):
+            assert await asyncio.wait_for(remote.send(i), 1)
+        await asyncio.sleep(0.05)
+        assert channel.full()
+        assert remote.full()
+        sender = event_loop.create_task(remote.send(4))
+        await asyncio.sleep(0.05)
+        assert not sender.done()
+        assert await channel.receive() == 1
+        assert await asyncio.wait_for(sender, 1)
+        assert [await channel.receive() for _ in range(3)] == [2, 3, 4]
+    finally:
+        await shutdown(remote, server)
+
+
+@pytest.mark.asyncio
+async def test_receive_from_remote(event_loop, tmp_path):
+    channel = Channel(maxsize=10)
+    address = str(tmp_path / "ch.sock")
+    server = await serve(channel, address, codec=RawBytesCodec())
+    remote = await RemoteChannel.connect(address, codec=RawBytesCodec())
+    try:
+        for i in range(3):
+            channel.send_nowait(b"item-%d" % i)
+        channel.close()
+        assert [await remote.receive() for _ in range(3)] == [
+            b"item-0",
+            b"item-1",
+            b"item-2",
+        ]
+        assert await remote.receive() is None
+        assert remote.is_closed()
+        assert await remote.send(b"x") is False
+    finally:
+        await shutdown(remote, server)
+
+
+@pytest.mark.asyncio
+async def test_sent_items_are_delivered_after_close(event_loop, tmp_path):
+    channel = Channel(maxsize=2)
+    address = str(tmp_path / "ch.sock")
+    server = await serve(channel, address, window=2)
+    remote = await RemoteChannel.connect(address)
+    try:
+        for i in range(1, 5):
+            assert await asyncio.wait_for(remote.send(i), 1)
+        remote.close()
+        await asyncio.sleep(0.05)
+        assert [
+            await asyncio.wait_for(channel.receive(), 1) for _ in range(4)
+        ] == [1, 2, 3, 4]
+    finally:
+        await shutdown(remote, server)
+
+
+@pytest.mark.asyncio
+async def test_item_of_cancelled_receive_is_kept(event_loop, tmp_path):
+    channel = Channel(maxsize=10)
+    address = str(tmp_path / "ch.sock")
+    server = await serve(channel, address)
+    remote = await RemoteChannel.connect(address)
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(remote.receive(), 0.05)
+        channel.send_nowait(1)
+        channel.send_nowait(2)
+        await asyncio.sleep(0.05)
+        assert await asyncio.wait_for(remote.receive(), 1) == 1
+        assert await asyncio.wait_for(remote.receive(), 1) == 2
+    finally:
+        await shutdown(remote, server)
+
+
+@pytest.mark.asyncio
+async def test_small_sends_are_coalesced(event_loop, tmp_path):
+    channel = Channel(maxsize=100)
+    address = str(tmp_path / "ch.sock")
+    server = await serve(channel, address)
+    remote = await RemoteChannel.connect(address)
+    try:
+        while remote.full():
+            await asyncio.sleep(0.01)
+        write = Mock(wraps=remote._writer.write)
+        remote._writer.write = write
+        for i in range(1, 101):
+            assert remote.send_nowait(i)
+        await asyncio.sleep(0)
+        assert write.call_count == 1
+        assert [await channel.receive() for _ in range(100)] == list(
+            range(1, 101)
+        )
+    finally:
+        await shutdown(remote, server)
+
+
+@pytest.mark.asyncio
+async def test_tcp_needs_an_explicit_codec(event_loop):
+    channel = Channel()
+    with pytest.raises(ValueError):
+        await serve(channel, ("127.0.0.1", 0))
+    server = await serve(channel, ("127.0.0.1", 0), codec=RawBytesCodec())
+    port = server.sockets[0].getsockname()[1]
+    try:
+        with pytest.raises(ValueError):
+            await RemoteChannel.connect(("127.0.0.1", port))
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_raw_bytes_codec():
+    codec = RawBytesCodec()
+    assert codec.encode(b"ab") == b"ab"
+    assert codec.encode(bytearray(b"ab")) == b"ab"
+    assert codec.encode(memoryview(b"ab")) == b"ab"
+    with pytest.raises(TypeError):
+        codec.encode(3)
+    with pytest.raises(TypeError):
+        codec.encode("ab")
+
+
+def test_msgpack_codec():
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError):
+            MsgpackCodec()
+    else:
+        codec = MsgpackCodec()
+        assert codec.decode(codec.encode([1, "a"])) == [1, "a"]
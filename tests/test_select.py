@@ -5,6 +5,8 @@ import pytest
 
 from one_ring import Channel, select
 
+pytestmark = pytest.mark.virtual_time
+
 
 async def nop(count=1):
     for _ in range(count):
@@ -0,0 +1,58 @@
+import pytest
+
+from one_ring import run_sharded, NurseryChildFailure
+
+
+async def ring_main(shard):
+    # every shard sends its id to the next one and sums what it receives
+    next_shard = (shard.shard_id + 1) % shard.workers
+    for i in range(100):
+        await shard.outbox(next_shard).send(shard.shard_id * 1000 + i)
+    for peer in shard.peers:
+        shard.outbox(peer).close()
+
+    total = 0
+    while True:
+        item = await shard.inbox.receive()
+        if item is None:
+            break
+        total += item
+    return total
+
+
+async def failing_main(shard):
+    if shard.shard_id == 1:
+        raise Exception("booo!")
+    # would block forever if the failure was not propagated
+    await shard.inbox.receive()
+    return shard.shard_id
+
+
+async def lonely_main(shard):
+    assert shard.peers == []
+    assert await shard.inbox.receive() is None
+    return "alone"
+
+
+def test_run_sharded_inter_shard_channels():
+    results = run_sharded(ring_main, workers=3)
+    expected = [
+        sum(((shard - 1) % 3) * 1000 + i for i in range(100))
+        for shard in range(3)
+    ]
+    assert results == expected
+
+
+def test_run_sharded_single_worker():
+    assert run_sharded(lonely_main, workers=1) == ["alone"]
+
+
+def test_run_sharded_failure_stops_all_shards():
+    with pytest.raises(NurseryChildFailure) as excinfo:
+        run_sharded(failing_main, workers=3)
+    assert "booo!" in str(excinfo.value.__cause__)
+
+
+def test_run_sharded_invalid_workers():
+    with pytest.raises(ValueError):
+        run_sharded(ring_main, workers=0)
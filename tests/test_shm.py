@@ -0,0 +1,112 @@
+import asyncio
+import multiprocessing
+from multiprocessing import shared_memory
+
+import pytest
+
+from one_ring import Channel, select
+from one_ring.shm import SharedMemoryChannel
+
+
+def producer(ch, count):
+    async def main():
+        for i in range(count):
+            assert await ch.send(i.to_bytes(4, "little") * 256)
+        ch.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+        ch.detach()
+
+
+@pytest.fixture
+def shm_channel():
+    ch = SharedMemoryChannel.create(slots=4, slot_size=1024)
+    yield ch
+    ch.unlink()
+
+
+def test_shared_memory_channel_arguments():
+    with pytest.raises(ValueError):
+        SharedMemoryChannel.create(slots=0)
+
+
+@pytest.mark.asyncio
+async def test_send_receive_nowait(event_loop, shm_channel):
+    ch = shm_channel
+    for i in range(4):
+        assert ch.send_nowait(bytes([i]) * 10)
+    assert ch.full()
+    assert not ch.send_nowait(b"x")
+    with pytest.raises(ValueError):
+        ch.send_nowait(b"x" * 1025)
+
+    view = ch.receive_nowait()
+    assert isinstance(view, memoryview)
+    assert view == b"\0" * 10
+    # the slot is still held until the next receive or release
+    assert not ch.send_nowait(b"x")
+    view.release()
+    ch.release()
+    assert ch.send_nowait(b"x")
+    assert ch.size() == 4
+    assert [bytes(ch.receive_nowait()) for _ in range(4)] == [
+        b"\1" * 10,
+        b"\2" * 10,
+        b"\3" * 10,
+        b"x",
+    ]
+    assert ch.receive_nowait() is None
+    assert ch.empty()
+
+
+@pytest.mark.asyncio
+async def test_blocked_sender_wakes_up(event_loop, shm_channel):
+    ch = shm_channel
+    for i in range(4):
+        assert ch.send_nowait(b"a")
+    sender = event_loop.create_task(ch.send(b"b"))
+    await asyncio.sleep(0.01)
+    assert not sender.done()
+    assert bytes(await ch.receive()) == b"a"
+    ch.release()
+    assert await sender
+    ch.close()
+    assert await ch.send(b"c") is False
+
+
+@pytest.mark.asyncio
+async def test_items_from_another_process(event_loop, shm_channel):
+    ch = shm_channel
+    count = 200
+    ctx = multiprocessing.get_context("fork")
+    p = ctx.Process(target=producer, args=(ch, count))
+    p.start()
+    other = Channel()
+    received = []
+    while True:
+        c, item = await select(ch.R(), other.R())
+        assert c is ch
+        if item is None:
+            break
+        received.append(int.from_bytes(item[:4], "little"))
+        assert len(item) == 1024
+        item.release()
+    await event_loop.run_in_executor(None, p.join)
+    assert received == list(range(count))
+
+
+def test_unlink_while_a_received_item_is_alive():
+    ch = SharedMemoryChannel.create(slots=2, slot_size=16)
+    name = ch._shm.name
+    assert ch.send_nowait(b"abc")
+    view = ch.receive_nowait()
+    ch.unlink()
+    # the item can still be read, but the segment is gone
+    assert view == b"abc"
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    view.release()
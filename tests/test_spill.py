@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from one_ring import SpillChannel
+
+
+def test_spill_channel_memory_items():
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            SpillChannel(memory_items=0, loop=loop)
+    finally:
+        loop.close()
+
+
+@pytest.mark.asyncio
+async def test_spilled_items_come_back_in_order(event_loop, tmp_path):
+    ch = SpillChannel(memory_items=3, directory=str(tmp_path))
+    for i in range(1, 101):
+        assert ch.send_nowait({"n": i})
+    assert not ch.full()
+    assert ch.size() == 100
+    assert len(ch._data) == 3
+    assert ch.spilled() == 97
+
+    received = [ch.receive_nowait()["n"] for _ in range(50)]
+    for i in range(101, 121):
+        assert await ch.send({"n": i})
+    while not ch.empty():
+        received.append((await ch.receive())["n"])
+    assert received == list(range(1, 121))
+    assert ch.spilled() == 0
+
+
+@pytest.mark.asyncio
+async def test_segments_are_rotated(event_loop, tmp_path):
+    ch = SpillChannel(memory_items=1, segment_size=64)
+    for i in range(1, 51):
+        assert ch.send_nowait(b"x" * i)
+    assert len(ch._segments) > 1
+    assert [len(ch.receive_nowait()) for _ in range(50)] == list(range(1, 51))
+    assert len(ch._segments) == 1
+    ch.release()
+
+
+@pytest.mark.asyncio
+async def test_waiting_receiver_gets_item(event_loop):
+    ch = SpillChannel(memory_items=1)
+    receiver = event_loop.create_task(ch.receive())
+    await asyncio.sleep(0)
+    ch.send_nowait(1)
+    assert await receiver == 1
+    ch.close()
+    assert await ch.receive() is None
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from one_ring import Channel, Nursery, Timeout, select
+from one_ring.testing import VirtualTimeEventLoop, run_virtual
+
+pytestmark = pytest.mark.virtual_time
+
+
+@pytest.mark.asyncio
+async def test_clock_jumps_to_next_timer(event_loop):
+    started = time.monotonic()
+    await asyncio.sleep(3600)
+    assert event_loop.time() == 3600
+    # longer than the maximum select timeout of asyncio
+    await asyncio.sleep(3 * 86400)
+    assert event_loop.time() == 3600 + 3 * 86400
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_timers_run_in_order(event_loop):
+    woke_up = []
+
+    async def sleeper(delay):
+        await asyncio.sleep(delay)
+        woke_up.append((delay, event_loop.time()))
+
+    async with Nursery() as n:
+        for delay in (5, 0.1, 60, 0.2, 1):
+            n.start(sleeper(delay))
+    assert woke_up == [(d, d) for d in (0.1, 0.2, 1, 5, 60)]
+
+
+@pytest.mark.asyncio
+async def test_timeout_in_select(event_loop):
+    ch = Channel()
+    timeout = Timeout(30)
+    assert await select(ch.R(), timeout.R()) == (timeout, 0)
+    assert event_loop.time() == 30
+
+
+@pytest.mark.asyncio
+async def test_executor_callbacks(event_loop):
+    assert await event_loop.run_in_executor(None, sum, [1, 2]) == 3
+    assert event_loop.time() == 0
+
+
+def test_advance():
+    loop = VirtualTimeEventLoop(start=10)
+    try:
+        fired = []
+        loop.call_at(15, fired.append, True)
+        loop.advance(5)
+        assert loop.time() == 15
+        with pytest.raises(ValueError):
+            loop.advance(-1)
+        loop.run_until_complete(asyncio.sleep(0))
+        assert fired == [True]
+    finally:
+        loop.close()
+
+
+def test_run_virtual():
+    async def main():
+        await asyncio.sleep(100)
+        return asyncio.get_event_loop().time()
+
+    assert run_virtual(main(), start=1) == 101
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from one_ring import ThreadSafeChannel, select
+
+
+def run_in_thread(func, *args):
+    result = []
+    t = threading.Thread(target=lambda: result.append(func(*args)))
+    t.start()
+    return t, result
+
+
+@pytest.mark.asyncio
+async def test_thread_sends_loop_receives(event_loop):
+    for maxsize in (0, 1, 10):
+        ch = ThreadSafeChannel(maxsize=maxsize)
+
+        def producer():
+            return [ch.send_blocking(i) for i in range(1, 101)]
+
+        t, result = run_in_thread(producer)
+        received = [await ch.receive() for _ in range(100)]
+        await event_loop.run_in_executor(None, t.join)
+        assert received == list(range(1, 101))
+        assert result == [[True] * 100]
+
+
+@pytest.mark.asyncio
+async def test_loop_sends_thread_receives(event_loop):
+    for maxsize in (0, 1, 10):
+        ch = ThreadSafeChannel(maxsize=maxsize)
+
+        def consumer():
+            return [ch.receive_blocking() for _ in range(100)]
+
+        t, result = run_in_thread(consumer)
+        for i in range(1, 101):
+            assert await ch.send(i)
+        await event_loop.run_in_executor(None, t.join)
+        assert result == [list(range(1, 101))]
+
+
+@pytest.mark.asyncio
+async def test_thread_senders_work_with_select(event_loop):
+    ch = ThreadSafeChannel()
+    other = ThreadSafeChannel()
+    t, _ = run_in_thread(ch.send_blocking, "x")
+    assert await select(ch.R(), other.R()) == (ch, "x")
+    await event_loop.run_in_executor(None, t.join)
+
+
+@pytest.mark.asyncio
+async def test_burst_costs_one_wakeup(event_loop):
+    ch = ThreadSafeChannel(maxsize=100)
+    wakeup = Mock(wraps=event_loop.call_soon_threadsafe)
+    event_loop.call_soon_threadsafe = wakeup
+    try:
+        futures = [ch.send_threadsafe(i) for i in range(1, 101)]
+        await asyncio.sleep(0)
+        assert wakeup.call_count == 1
+        assert all(f.result() for f in futures)
+        assert ch.size() == 100
+    finally:
+        del event_loop.call_soon_threadsafe
+
+
+@pytest.mark.asyncio
+async def test_close_releases_thread_receivers(event_loop):
+    ch = ThreadSafeChannel()
+    t, result = run_in_thread(ch.receive_blocking)
+    await asyncio.sleep(0.05)
+    ch.close_threadsafe()
+    await event_loop.run_in_executor(None, t.join)
+    assert result == [None]
+    assert await asyncio.wrap_future(ch.send_threadsafe(1)) is False
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_on_loop_thread(event_loop):
+    ch = ThreadSafeChannel(maxsize=1)
+    with pytest.raises(RuntimeError):
+        ch.send_blocking(1)
+    with pytest.raises(RuntimeError):
+        ch.receive_blocking()
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from one_ring import (
+    Channel,
+    ChromeTraceRecorder,
+    Nursery,
+    add_hook,
+    remove_hook,
+    select,
+)
+from one_ring.tracing import _hooks
+
+
+@pytest.mark.asyncio
+async def test_hooks_get_channel_and_nursery_events(event_loop):
+    events = []
+
+    def hook(event, source, data):
+        events.append((event, source, data))
+
+    add_hook(hook)
+    try:
+        ch = Channel(name="traced")
+
+        async def produce():
+            await ch.send("a")
+
+        async def fail():
+            raise ValueError
+
+        async with Nursery() as n:
+            producer = n.start(produce(), name="producer")
+            failing = n.start(fail(), name="failing")
+            await asyncio.sleep(0)
+            assert await select(ch.R()) == (ch, "a")
+        ch.close()
+    finally:
+        remove_hook(hook)
+    assert not _hooks
+
+    names = [event for event, _, _ in events]
+    assert names.count("nursery.task_start") == 2
+    assert ("channel.block_send", ch, None) in events
+    assert ("channel.unblock_send", ch, None) in events
+    assert ("channel.send", ch, "a") in events
+    assert ("channel.receive", ch, "a") in events
+    assert ("select.won", ch, 1) in events
+    assert ("channel.close", ch, None) in events
+    assert ("nursery.task_finish", n, producer) in events
+    assert ("nursery.task_fail", n, failing) in events
+
+
+@pytest.mark.asyncio
+async def test_chrome_trace_recorder(event_loop, tmp_path):
+    ch = Channel(maxsize=1, name="pipe")
+
+    async def consume():
+        while await ch.receive() is not None:
+            await asyncio.sleep(0)
+
+    with ChromeTraceRecorder() as recorder:
+        async with Nursery() as n:
+            n.start(consume(), name="consumer")
+            await asyncio.sleep(0)
+            for i in range(1, 4):
+                await ch.send(i)
+            ch.close()
+    assert not _hooks
+
+    path = tmp_path / "trace.json"
+    recorder.save(str(path))
+    trace = json.loads(path.read_text())["traceEvents"]
+    tracks = {e["args"]["name"]: e["tid"] for e in trace if e["ph"] == "M"}
+    consumer = [e for e in trace if e["tid"] == tracks["consumer"]]
+    assert consumer[1]["ph"] == "B" and consumer[1]["name"] == "consumer"
+    assert consumer[-1]["ph"] == "E"
+    assert consumer[-1]["args"] == {"outcome": "finish"}
+    blocked = [e for e in consumer if e["name"] == "blocked on receive"]
+    assert blocked and len(blocked) % 2 == 0
+    assert all(e["args"] == {"channel": "pipe"} for e in blocked)
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from one_ring import ActionOnFailure, Channel, Nursery, WorkerPool
+
+
+def test_worker_pool_bounds():
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            WorkerPool(Channel(loop=loop), None, 3, 2, loop=loop)
+        with pytest.raises(ValueError):
+            WorkerPool(Channel(loop=loop), None, 0, 0, loop=loop)
+        with pytest.raises(ValueError):
+            WorkerPool(
+                Channel(loop=loop),
+                None,
+                high_watermark=1,
+                low_watermark=1,
+                loop=loop,
+            )
+    finally:
+        loop.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_follows_backlog(event_loop):
+    source = Channel(maxsize=100)
+    handled = []
+    peak = []
+
+    async def handler(item):
+        await asyncio.sleep(0.02)
+        handled.append(item)
+
+    pool = WorkerPool(
+        source,
+        handler,
+        min_workers=1,
+        max_workers=4,
+        interval=0.01,
+        cooldown=0.05,
+    )
+
+    async def producer():
+        for i in range(1, 61):
+            await source.send(i)
+        while source.size():
+            peak.append(pool.workers)
+            await asyncio.sleep(0.01)
+        # let the pool go idle before closing the source
+        await asyncio.sleep(0.5)
+        peak.append(pool.workers)
+        source.close()
+
+    async with Nursery() as n:
+        n.start(producer())
+        await pool.run()
+
+    assert sorted(handled) == list(range(1, 61))
+    assert max(peak) == 4
+    assert peak[-1] == 1
+    assert pool.workers == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_counts_blocked_senders(event_loop):
+    source = Channel()
+    pool = WorkerPool(source, None, min_workers=0, max_workers=2)
+    tasks = [event_loop.create_task(source.send(i)) for i in range(1, 4)]
+    await asyncio.sleep(0.01)
+    assert pool.backlog() == 3
+    for t in tasks:
+        t.cancel()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_replaces_failed_workers(event_loop):
+    source = Channel(maxsize=100)
+    handled = []
+    workers = []
+
+    async def handler(item):
+        if item == 1:
+            raise ValueError("boom")
+        await asyncio.sleep(0.02)
+        handled.append(item)
+
+    pool = WorkerPool(
+        source,
+        handler,
+        min_workers=2,
+        max_workers=4,
+        interval=0.01,
+        on_failure=ActionOnFailure.IGNORE_WITHOUT_RAISE,
+    )
+
+    async def producer():
+        await source.send(1)
+        await asyncio.sleep(0.05)
+        workers.append(pool.workers)
+        for i in range(2, 41):
+            await source.send(i)
+        await asyncio.sleep(0.02)
+        workers.append(pool.workers)
+        source.close()
+
+    async with Nursery() as n:
+        n.start(producer())
+        await pool.run()
+
+    assert sorted(handled) == list(range(2, 41))
+    assert workers == [2, 4]
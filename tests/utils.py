@@ -0,0 +1,77 @@
+import gc
+import tracemalloc
+from typing import Any, Awaitable, Callable, NamedTuple
+
+
+class Allocations(NamedTuple):
+    """Memory allocated by one operation, measured with tracemalloc"""
+
+    # the most bytes the operation had allocated at the same time
+    peak_bytes: int
+    # bytes and memory blocks that were still allocated after it, per op
+    retained_bytes: float
+    retained_blocks: float
+
+
+async def measure_allocations(
+    op: Callable[[], Any], repeat: int = 200, warmup: int = 20
+) -> Allocations:
+    """Measures the allocations of `op`, a function or a coroutine function
+
+    It runs inside the event loop so the loop machinery itself is not
+    counted; an async `op` includes its own coroutine object.
+    """
+
+    async def run_once() -> None:
+        result = op()
+        if isinstance(result, Awaitable):
+            await result
+
+    for _ in range(warmup):
+        await run_once()
+    gc.collect()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        gc.disable()
+        peak = 0
+        before = tracemalloc.take_snapshot()
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            await run_once()
+            _, op_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, op_peak - current)
+        after = tracemalloc.take_snapshot()
+    finally:
+        gc.enable()
+        if not was_tracing:
+            tracemalloc.stop()
+    retained = [
+        stat
+        for stat in after.compare_to(before, "filename")
+        if not stat.traceback[0].filename.startswith(tracemalloc.__file__)
+    ]
+    return Allocations(
+        peak_bytes=peak,
+        retained_bytes=sum(s.size_diff for s in retained) / repeat,
+        retained_blocks=sum(s.count_diff for s in retained) / repeat,
+    )
+
+
+def assert_allocations(allocations: Allocations, peak_bytes: int) -> None:
+    """Fails if an operation goes over its allocation budget or leaks
+
+    A leak keeps at least one block per operation; less than half a block
+    is a container of the loop that grew once, amortized over the ops.
+    """
+    assert allocations.peak_bytes <= peak_bytes, (
+        "allocates more than its budget",
+        allocations,
+        {"peak_bytes": peak_bytes},
+    )
+    assert allocations.retained_blocks < 0.5, (
+        "keeps memory allocated after it is done",
+        allocations,
+    )